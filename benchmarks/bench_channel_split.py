@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the channel split used by ``AppVertexColorFilter.setup_color_set``.
+
+Compares the former per-vertex ``filter_color`` loop against the vectorized
+``vertex_color_engine.extract_channel`` on synthetic color buffers.
+
+    python benchmarks/bench_channel_split.py
+    python benchmarks/bench_channel_split.py --sizes 10000 1000000 4000000
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+import argparse
+import os
+import sys
+import timeit
+
+# Import third-party modules
+import numpy
+
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(DIR), "scripts"))
+
+# Import local modules
+import vertex_color_engine  # noqa: E402
+
+
+CHANNELS = "RGBA"
+
+
+def filter_color(color, index):
+    color_list = [0, 0, 0, 1]
+    color_list[index] = color[index]
+    return tuple(color_list)
+
+
+def split_loop(colors):
+    for channel_index, _ in enumerate(CHANNELS):
+        final_colors = []
+        for color in colors:
+            final_colors.append(filter_color(color, channel_index))
+
+
+def split_vectorized(colors):
+    for channel_index, _ in enumerate(CHANNELS):
+        vertex_color_engine.extract_channel(colors, channel_index)
+
+
+def measure(func, arg, repeat):
+    return min(timeit.repeat(lambda: func(arg), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10000, 100000, 1000000]
+    )
+    parser.add_argument("--loop-limit", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = ("vertices", "loop (s)", "numpy (s)", "speedup")
+    print("{0:>10} {1:>12} {2:>12} {3:>9}".format(*header))
+    for size in args.sizes:
+        colors = numpy.random.rand(size, 4).astype(numpy.float32)
+        vectorized = measure(split_vectorized, colors, args.repeat)
+        if size <= args.loop_limit:
+            loop = measure(split_loop, colors.tolist(), 1)
+            speedup = "{0:.1f}x".format(loop / vectorized)
+            row = (size, "{0:.4f}".format(loop), vectorized, speedup)
+        else:
+            row = (size, "-", vectorized, "-")
+        print("{0:>10} {1:>12} {2:>12.4f} {3:>9}".format(*row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark ``AppVertexColorFilter.is_viewport`` with and without its widget cache.
+
+``objectTypeUI`` is a PyMEL to MEL round trip inside Maya. The stand-in only
+simulates it by spinning for ``--mel-latency`` microseconds per call.
+
+    python benchmarks/bench_is_viewport.py
+    python benchmarks/bench_is_viewport.py --widgets 200 --mel-latency 40
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+import argparse
+import os
+import sys
+import timeit
+
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, DIR)
+
+# Import local modules
+from bench_paint_pipeline import load_plugin  # noqa: E402
+import maya_standin  # noqa: E402
+
+
+def build_widgets(count):
+    """Return viewports under model editors mixed with other widgets."""
+    widgets = []
+    for index in range(count):
+        panel = maya_standin.QObject()
+        panel.setObjectName("modelPanel{0}".format(index))
+        if index % 2:
+            maya_standin.State.model_editors.add(panel.objectName())
+        widgets.append(maya_standin.QObject(panel))
+    return widgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--widgets", type=int, default=100)
+    parser.add_argument("--mel-latency", type=float, default=30.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    plugin = load_plugin()
+    maya_standin.State.mel_latency = args.mel_latency / 1e6
+    event_filter = plugin.AppVertexColorFilter()
+    widgets = build_widgets(args.widgets)
+
+    def uncached():
+        for widget in widgets:
+            event_filter.viewport_cache.clear()
+            event_filter.is_viewport(widget)
+
+    def cached():
+        for widget in widgets:
+            event_filter.is_viewport(widget)
+
+    print("{0:>10} {1:>14}".format("cache", "us per event"))
+    for name, func in (("off", uncached), ("on", cached)):
+        func()
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print("{0:>10} {1:>14.2f}".format(name, seconds / len(widgets) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
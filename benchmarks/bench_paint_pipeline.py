@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the paint pipeline of the vertex color painter on synthetic meshes.
+
+Loads the plugin against ``maya_standin`` and times tool activation, stroke
+release, undo and redo from 10k up to 10M vertices. Results are written as
+JSON so runs can be compared with ``--compare``.
+
+    python benchmarks/bench_paint_pipeline.py
+    python benchmarks/bench_paint_pipeline.py --sizes 10000 10000000 -o new.json
+    python benchmarks/bench_paint_pipeline.py --compare old.json
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import sys
+import timeit
+
+# Import third-party modules
+import numpy
+
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(DIR)
+PLUGIN_PATH = os.path.join(ROOT, "plug-ins", "vertex_color_painter.py")
+sys.path.insert(0, DIR)
+
+# Import local modules
+import maya_standin  # noqa: E402
+
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+MODES = ["RGB", "R"]
+
+
+def load_plugin():
+    maya_standin.install()
+    sys.path.insert(0, os.path.join(ROOT, "scripts"))
+    spec = importlib.util.spec_from_file_location("vertex_color_painter", PLUGIN_PATH)
+    plugin = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(plugin)
+    return plugin
+
+
+def reset_plugin(plugin):
+    command = plugin.ApplyVertexColorCommand
+    command.vertex_ids_data.clear()
+    command.vertex_snapshot_data.clear()
+    command.vertex_color_data.clear()
+    command.undone_steps.clear()
+    command.evicted_step = 0
+    command.eviction_count = 0
+
+
+def setup_scene(plugin, size, mode):
+    maya_standin.reset()
+    reset_plugin(plugin)
+    path = maya_standin.create_mesh("pPlane1", size)
+    maya_standin.State.paint_nodes = [path]
+    # NOTE(timmyliang): radio button index 0 is RGB, 1-4 are the channels
+    index = plugin.OPTION_ITEMS.index(mode) - 1
+    maya_standin.CONTROLS[plugin.SINGLE_CONTROL] = {"sl": index}
+    plugin.PaintUIState.refresh_channel()
+    return path
+
+
+def paint_stroke(plugin, path, mode, brush_ratio, seed):
+    """Collect a brush region and paint it the way Maya artisan would."""
+    mesh = maya_standin.SCENE[path]
+    main_color_set = next(iter(mesh.color_sets))
+    command = plugin.ApplyVertexColorCommand
+    count = mesh.vertex_count
+    brush_count = max(int(count * brush_ratio), 1)
+    start = numpy.random.RandomState(seed).randint(0, count - brush_count + 1)
+    vtx_ids = numpy.arange(start, start + brush_count, dtype=numpy.int32)
+
+    command.vertex_ids_data[path] = vtx_ids
+    if mode == "RGB":
+        command.vertex_snapshot_data[path] = mesh.color_sets[main_color_set].copy()
+    color_set = main_color_set if mode == "RGB" else "VertexColor{0}".format(mode)
+    mesh.color_sets[color_set][vtx_ids] = (0.25, 0.5, 0.75, 1.0)
+
+
+def time_call(func):
+    return timeit.timeit(func, number=1)
+
+
+def run_case(plugin, size, mode, brush_ratio, repeat):
+    timings = {"activate": [], "release": [], "undo": [], "redo": []}
+    for seed in range(repeat):
+        path = setup_scene(plugin, size, mode)
+        setup_color_set = plugin.AppVertexColorFilter.setup_color_set
+        timings["activate"].append(time_call(setup_color_set))
+        paint_stroke(plugin, path, mode, brush_ratio, seed)
+        command = plugin.ApplyVertexColorCommand()
+        timings["release"].append(time_call(lambda: command.doIt(None)))
+        timings["undo"].append(time_call(command.undoIt))
+        timings["redo"].append(time_call(command.redoIt))
+    return [
+        {
+            "size": size,
+            "mode": mode,
+            "brush_ratio": brush_ratio,
+            "phase": phase,
+            "seconds": min(values),
+        }
+        for phase, values in timings.items()
+    ]
+
+
+def result_key(result):
+    return (result["size"], result["mode"], result["brush_ratio"], result["phase"])
+
+
+def print_results(results, baseline=None):
+    baseline = {result_key(result): result for result in baseline or []}
+    header = "{0:>10} {1:>5} {2:>6} {3:>9} {4:>11} {5:>9}"
+    print(header.format("vertices", "mode", "brush", "phase", "seconds", "vs base"))
+    for result in results:
+        base = baseline.get(result_key(result))
+        ratio = "{0:.2f}x".format(result["seconds"] / base["seconds"]) if base else "-"
+        print(
+            "{0:>10} {1:>5} {2:>6.3f} {3:>9} {4:>11.5f} {5:>9}".format(
+                result["size"],
+                result["mode"],
+                result["brush_ratio"],
+                result["phase"],
+                result["seconds"],
+                ratio,
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--modes", nargs="+", default=MODES, choices=["RGB"] + list("RGBA")
+    )
+    parser.add_argument("--brush-ratio", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    plugin = load_plugin()
+    results = []
+    for size in args.sizes:
+        for mode in args.modes:
+            results.extend(run_case(plugin, size, mode, args.brush_ratio, args.repeat))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)["results"]
+    print_results(results, baseline)
+
+    with open(args.output, "w") as handle:
+        json.dump(
+            {
+                "created": datetime.datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "numpy": numpy.__version__,
+                "machine": platform.machine(),
+                "results": results,
+            },
+            handle,
+            indent=2,
+        )
+    print("results written to {0}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,709 @@
+# -*- coding: utf-8 -*-
+"""
+Headless stand-in for the Maya modules used by the vertex color painter.
+
+Registers fake ``maya.OpenMaya``, ``maya.OpenMayaMPx``, ``maya.OpenMayaUI``,
+``pymel.core``, ``pymel.tools.py2mel`` and ``Qt`` modules so the plugin can
+be imported and profiled on plain CPython. Meshes live in ``SCENE`` as numpy
+buffers and only the API surface the plugin touches is implemented.
+
+    import maya_standin
+    maya_standin.install()
+    path = maya_standin.create_mesh("pPlane1", 100000)
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+from collections import OrderedDict
+import ctypes
+import math
+import re
+import sys
+import time
+import types
+
+# Import third-party modules
+import numpy
+
+
+SCENE = OrderedDict()
+OPTION_VARS = {}
+CONTROLS = {}
+
+
+class State(object):
+    paint_nodes = []
+    selection = []
+    # NOTE(timmyliang): selected vertex ranges like ``|pPlane1|pPlane1Shape.vtx[0:9]``
+    components = []
+    brush_radius = 1.0
+    paint_operation = "absolute"
+    current_ctx = "artAttrColorPerVertexContext"
+    ctx_color = (1.0, 1.0, 1.0, 1.0)
+    model_editors = set()
+    # NOTE(timmyliang): seconds spent by each PyMEL to MEL round trip
+    mel_latency = 0.0
+
+
+def reset():
+    """Clear the scene, option vars and UI controls."""
+    SCENE.clear()
+    OPTION_VARS.clear()
+    CONTROLS.clear()
+    State.paint_nodes = []
+    State.selection = []
+    State.components = []
+
+
+# ---------------------------------------------------------------------------
+# Scene data
+# ---------------------------------------------------------------------------
+
+
+class MeshData(object):
+    def __init__(self, path, points, counts, connects):
+        self.path = path
+        self.points = points
+        self.counts = counts
+        self.connects = connects
+        self.color_sets = OrderedDict()
+        self.representations = {}
+        self.current_color_set = None
+        self.attrs = {"displayColors": 0}
+
+    @property
+    def vertex_count(self):
+        return len(self.points)
+
+    def create_color_set(self, name=None, rpt="RGBA"):
+        name = name or "colorSet{0}".format(len(self.color_sets) + 1)
+        colors = numpy.empty((self.vertex_count, 4), dtype=numpy.float32)
+        colors[:] = -1
+        self.color_sets[name] = colors
+        self.representations[name] = rpt
+        self.current_color_set = self.current_color_set or name
+        return name
+
+    def delete_color_set(self, name):
+        del self.color_sets[name]
+        del self.representations[name]
+        if self.current_color_set == name:
+            self.current_color_set = next(iter(self.color_sets), None)
+
+
+def create_mesh(name, vertex_count, seed=0):
+    """Create a grid mesh with at least ``vertex_count`` vertices.
+
+    Returns:
+        str: the full path of the mesh shape.
+    """
+    side = max(int(math.ceil(math.sqrt(vertex_count))), 2)
+    grid = numpy.arange(side, dtype=numpy.float32)
+    x, z = numpy.meshgrid(grid, grid)
+    y = numpy.zeros(side * side, dtype=numpy.float32)
+    points = numpy.stack([x.ravel(), y, z.ravel()], 1)
+
+    rows = numpy.arange(side - 1, dtype=numpy.int32)
+    corners = (rows[:, None] * side + rows[None, :]).ravel()
+    quads = [corners, corners + 1, corners + side + 1, corners + side]
+    connects = numpy.stack(quads, 1)
+    counts = numpy.full(len(corners), 4, dtype=numpy.int32)
+
+    path = "|{0}|{0}Shape".format(name)
+    mesh = MeshData(path, points, counts, connects.ravel())
+    color_set = mesh.create_color_set()
+    mesh.color_sets[color_set] = numpy.random.RandomState(seed).rand(
+        mesh.vertex_count, 4
+    ).astype(numpy.float32)
+    SCENE[path] = mesh
+    return path
+
+
+def resolve(path):
+    path = str(path)
+    if path in SCENE:
+        return SCENE[path]
+    for full_path, mesh in SCENE.items():
+        if full_path.endswith("|" + path) or full_path.split("|")[1] == path:
+            return mesh
+    raise RuntimeError("No object matches name: {0}".format(path))
+
+
+# ---------------------------------------------------------------------------
+# maya.OpenMaya
+# ---------------------------------------------------------------------------
+
+
+class Pointer(object):
+    """Raw pointer returned by ``MScriptUtil``, ``int()`` gives the address."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __int__(self):
+        return self.buffer.ctypes.data
+
+    __index__ = __int__
+
+
+class MScriptUtil(object):
+    def __init__(self):
+        self.values = []
+        self.buffer = None
+
+    def createFromList(self, values, length):
+        self.values = values
+
+    def as_pointer(self, dtype):
+        self.buffer = numpy.array(self.values, dtype=dtype)
+        return Pointer(self.buffer)
+
+    def asFloat4Ptr(self):
+        return self.as_pointer(numpy.float32)
+
+    def asUcharPtr(self):
+        return self.as_pointer(numpy.uint8)
+
+    def asIntPtr(self):
+        return self.as_pointer(numpy.int32)
+
+    @staticmethod
+    def createIntArrayFromList(values, array):
+        array.data = numpy.array(values, dtype=numpy.int32)
+
+
+class MColor(tuple):
+    def __new__(cls, r=0.0, g=0.0, b=0.0, a=1.0):
+        return super(MColor, cls).__new__(cls, (r, g, b, a))
+
+
+class MColorArray(object):
+    def __init__(self, *args):
+        if args:
+            ptr, count = args
+            self.data = ptr.buffer[: count * 4].reshape(count, 4).copy()
+        else:
+            self.data = numpy.zeros((0, 4), dtype=numpy.float32)
+
+    def length(self):
+        return len(self.data)
+
+    def get(self, ptr):
+        ctypes.memmove(int(ptr), self.data.ctypes.data, self.data.nbytes)
+
+    def __getitem__(self, index):
+        return MColor(*self.data[index])
+
+
+class MIntArray(object):
+    def __init__(self):
+        self.data = numpy.zeros(0, dtype=numpy.int32)
+
+    def length(self):
+        return len(self.data)
+
+    def get(self, ptr):
+        ctypes.memmove(int(ptr), self.data.ctypes.data, self.data.nbytes)
+
+    def __iter__(self):
+        return iter(self.data.tolist())
+
+
+class MMatrix(object):
+    def __init__(self, rows=None):
+        if isinstance(rows, MMatrix):
+            rows = rows.rows
+        self.rows = numpy.identity(4) if rows is None else numpy.array(rows)
+
+    def __call__(self, row, column):
+        return float(self.rows[row, column])
+
+    def __mul__(self, other):
+        return MMatrix(numpy.dot(self.rows, other.rows))
+
+
+class MDagPath(object):
+    def __init__(self, path=""):
+        self.path = path
+
+    def fullPathName(self):
+        return self.path
+
+    def inclusiveMatrix(self):
+        return MMatrix()
+
+    def node(self):
+        return self.path
+
+
+class MObject(object):
+    def __init__(self):
+        self.data = numpy.zeros(0, dtype=numpy.int32)
+
+
+class MSelectionList(object):
+    """Only holds vertex components named like ``path.vtx[start:end]``."""
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        path, start, end = re.match(r"(.+)\.vtx\[(\d+)(?::(\d+))?\]$", name).groups()
+        ids = numpy.arange(int(start), int(end or start) + 1, dtype=numpy.int32)
+        self.items.append((resolve(path).path, ids))
+
+    def length(self):
+        return len(self.items)
+
+    def getDagPath(self, index, dag_path, component):
+        dag_path.path, component.data = self.items[index]
+
+
+class MFnSingleIndexedComponent(object):
+    def __init__(self, component):
+        self.component = component
+
+    def getElements(self, elements):
+        elements.data = self.component.data
+
+
+class MFnMesh(object):
+    def __init__(self, dag_path):
+        self.data = resolve(dag_path.fullPathName())
+
+    def getVertexColors(self, color_array, color_set):
+        color_array.data = self.data.color_sets[color_set].copy()
+
+    def setVertexColors(self, color_array, vertex_ids):
+        colors = self.data.color_sets[self.data.current_color_set]
+        colors[vertex_ids.data] = color_array.data
+
+    def currentColorSetName(self):
+        return self.data.current_color_set
+
+    def setCurrentColorSetName(self, color_set):
+        self.data.current_color_set = color_set
+
+    def getColorSetNames(self, color_sets):
+        color_sets.extend(self.data.color_sets)
+
+    def updateSurface(self):
+        pass
+
+    def numVertices(self):
+        return self.data.vertex_count
+
+    def numPolygons(self):
+        return len(self.data.counts)
+
+    def numFaceVertices(self):
+        return len(self.data.connects)
+
+    def getRawPoints(self):
+        return Pointer(self.data.points)
+
+    def getVertices(self, counts, connects):
+        counts.data = numpy.asarray(self.data.counts, dtype=numpy.int32)
+        connects.data = numpy.asarray(self.data.connects, dtype=numpy.int32)
+
+
+class MSyntax(object):
+    kNoArg, kBoolean, kLong, kDouble, kString = range(5)
+
+    def __init__(self):
+        self.flags = {}
+
+    def addFlag(self, short_name, long_name, *arg_types):
+        self.flags[short_name] = self.flags[long_name] = arg_types
+
+
+class MArgDatabase(object):
+    def __init__(self, syntax, args):
+        self.args = args or {}
+
+    def isFlagSet(self, flag):
+        return flag in self.args
+
+    def flagArgument(self, flag, index):
+        return self.args[flag][index]
+
+    flagArgumentString = flagArgumentDouble = flagArgumentInt = flagArgument
+
+
+class MMessage(object):
+    @staticmethod
+    def removeCallback(callback_id):
+        pass
+
+
+def add_callback(*args):
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# maya.OpenMayaMPx
+# ---------------------------------------------------------------------------
+
+
+class MPxCommand(object):
+    def __init__(self):
+        self.result = []
+
+    def syntax(self):
+        return MSyntax()
+
+    def setResult(self, value):
+        self.result = value
+
+    def appendToResult(self, value):
+        self.result.append(value)
+
+
+class MFnPlugin(object):
+    def __init__(self, *args):
+        self.commands = {}
+
+    def registerCommand(self, name, creator, syntax_creator=None):
+        self.commands[name] = creator
+
+    def deregisterCommand(self, name):
+        self.commands.pop(name, None)
+
+
+# ---------------------------------------------------------------------------
+# pymel.core
+# ---------------------------------------------------------------------------
+
+
+class Attribute(object):
+    def __init__(self, attrs, name):
+        self.attrs = attrs
+        self.name = name
+
+    def get(self):
+        return self.attrs.get(self.name)
+
+    def set(self, value):
+        self.attrs[self.name] = value
+
+
+class PyNode(object):
+    def __init__(self, path):
+        self.data = resolve(path)
+
+    def __str__(self):
+        return self.data.path
+
+    def __eq__(self, other):
+        return str(self) == str(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def fullPathName(self):
+        return self.data.path
+
+    def __apimfn__(self):
+        return MFnMesh(self.__apimdagpath__())
+
+    def __apimdagpath__(self):
+        return MDagPath(self.data.path)
+
+    def __getattr__(self, name):
+        data = self.__dict__.get("data")
+        if data is None or name not in data.attrs:
+            raise AttributeError(name)
+        return Attribute(data.attrs, name)
+
+    def hasAttr(self, name):
+        return name in self.data.attrs
+
+    def addAttr(self, name, **kwargs):
+        self.data.attrs[name] = None
+
+    def attr(self, name):
+        return Attribute(self.data.attrs, name)
+
+    def getCurrentColorSetName(self):
+        return self.data.current_color_set
+
+    def setCurrentColorSetName(self, color_set):
+        self.data.current_color_set = color_set
+
+
+class Mel(object):
+    """``pymel.core.mel`` stand-in, every procedure returns ``None``."""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+
+class PyMelCore(types.ModuleType):
+    """``pymel.core`` stand-in, unknown commands return ``None``."""
+
+    PyNode = PyNode
+    mel = Mel()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: None
+
+    @staticmethod
+    def artAttrPaintVertexCtx(ctx, q=False, pna=False, radius=False, **kwargs):
+        if q and pna:
+            return " ".join(State.paint_nodes)
+        if q and radius:
+            return State.brush_radius
+        if q and kwargs.get("selectedattroper"):
+            return State.paint_operation
+        if q and kwargs.get("cl4"):
+            return list(State.ctx_color)
+        if kwargs.get("e") and "cl4" in kwargs:
+            State.ctx_color = tuple(kwargs["cl4"])
+
+    @staticmethod
+    def polyColorSet(node, q=False, create=False, delete=False, **kwargs):
+        mesh = resolve(node)
+        colorSet = kwargs.get("colorSet")
+        allColorSets = kwargs.get("allColorSets")
+        currentColorSet = kwargs.get("currentColorSet")
+        rpt = kwargs.get("rpt", "RGBA")
+        if q and allColorSets:
+            return list(mesh.color_sets) or None
+        if q and kwargs.get("representation"):
+            return mesh.representations[colorSet]
+        if create:
+            return [mesh.create_color_set(colorSet, rpt)]
+        if delete:
+            mesh.delete_color_set(colorSet)
+        elif currentColorSet:
+            mesh.current_color_set = colorSet
+
+    @staticmethod
+    def optionVar(q=None, exists=None, **kwargs):
+        if exists is not None:
+            return exists in OPTION_VARS
+        return OPTION_VARS.get(q)
+
+    @staticmethod
+    def control_query(name, q=False, ex=False, **kwargs):
+        if q and ex:
+            return name in CONTROLS
+        values = CONTROLS.setdefault(name, {})
+        if q:
+            return next(values.get(flag) for flag in kwargs)
+        values.update(kwargs)
+
+    radioButtonGrp = optionMenuGrp = colorSliderGrp = floatSliderGrp = control_query
+
+    @staticmethod
+    def ls(sl=False, type=None, **kwargs):
+        if sl:
+            return [PyNode(path) for path in State.selection]
+        return [PyNode(path) for path in State.paint_nodes] if type == "mesh" else []
+
+    @staticmethod
+    def filterExpand(selectionMask=None, expand=True):
+        return list(State.components) or None
+
+    @staticmethod
+    def polyListComponentConversion(components, toVertex=False):
+        return list(components)
+
+    @staticmethod
+    def objExists(path):
+        try:
+            resolve(path)
+        except RuntimeError:
+            return False
+        return True
+
+    @staticmethod
+    def evalDeferred(func, **kwargs):
+        func()
+
+    @staticmethod
+    def currentCtx():
+        return State.current_ctx
+
+    @staticmethod
+    def getPanel(**kwargs):
+        return []
+
+    @staticmethod
+    def objectTypeUI(name, i=None):
+        end = time.time() + State.mel_latency
+        while time.time() < end:
+            pass
+        return i == "modelEditor" and name in State.model_editors
+
+
+# ---------------------------------------------------------------------------
+# Qt
+# ---------------------------------------------------------------------------
+
+
+class BoundSignal(object):
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self.slots:
+            slot(*args)
+
+
+class Signal(object):
+    def __init__(self, *types):
+        self.key = "_signal_{0}".format(id(self))
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        return obj.__dict__.setdefault(self.key, BoundSignal())
+
+
+class QObject(object):
+    def __init__(self, parent=None, *args, **kwargs):
+        self._parent = parent
+        self._object_name = ""
+
+    def parent(self):
+        return self._parent
+
+    def objectName(self):
+        return self._object_name
+
+    def setObjectName(self, name):
+        self._object_name = name
+
+    def deleteLater(self):
+        pass
+
+
+class QEvent(object):
+    MouseButtonPress = 2
+    MouseButtonRelease = 3
+    MouseMove = 5
+    KeyPress = 6
+    Show = 17
+    WinIdChange = 203
+
+    def __init__(self, event_type):
+        self.event_type = event_type
+
+    def type(self):
+        return self.event_type
+
+
+class QApplication(QObject):
+    app = None
+
+    @classmethod
+    def instance(cls):
+        cls.app = cls.app or cls()
+        return cls.app
+
+    def installEventFilter(self, obj):
+        pass
+
+    def removeEventFilter(self, obj):
+        pass
+
+
+def build_module(name, **members):
+    module = types.ModuleType(name)
+    module.__dict__.update(members)
+    return module
+
+
+def install():
+    """Register the stand-in modules in ``sys.modules``."""
+    open_maya = build_module(
+        "maya.OpenMaya",
+        MScriptUtil=MScriptUtil,
+        MColor=MColor,
+        MColorArray=MColorArray,
+        MIntArray=MIntArray,
+        MMatrix=MMatrix,
+        MDagPath=MDagPath,
+        MObject=MObject,
+        MSelectionList=MSelectionList,
+        MFnSingleIndexedComponent=MFnSingleIndexedComponent,
+        MFnMesh=MFnMesh,
+        MSyntax=MSyntax,
+        MArgDatabase=MArgDatabase,
+        MMessage=MMessage,
+        MEventMessage=build_module("MEventMessage", addEventCallback=add_callback),
+        MDagMessage=build_module(
+            "MDagMessage", addWorldMatrixModifiedCallback=add_callback
+        ),
+        MPolyMessage=build_module(
+            "MPolyMessage",
+            addPolyTopologyChangedCallback=add_callback,
+            addColorSetChangedCallback=add_callback,
+        ),
+        MNodeMessage=build_module(
+            "MNodeMessage", addNodePreRemovalCallback=add_callback
+        ),
+    )
+    open_maya_mpx = build_module(
+        "maya.OpenMayaMPx",
+        MPxCommand=MPxCommand,
+        MFnPlugin=MFnPlugin,
+        asMPxPtr=lambda obj: obj,
+    )
+    open_maya_ui = build_module(
+        "maya.OpenMayaUI",
+        MUiMessage=build_module("MUiMessage", addCameraChangedCallback=add_callback),
+    )
+    maya = build_module(
+        "maya", OpenMaya=open_maya, OpenMayaMPx=open_maya_mpx, OpenMayaUI=open_maya_ui
+    )
+
+    core = PyMelCore("pymel.core")
+    py2mel = build_module("pymel.tools.py2mel", py2melProc=lambda *args, **kwargs: None)
+    tools = build_module("pymel.tools", py2mel=py2mel)
+    pymel = build_module("pymel", core=core, tools=tools)
+
+    qt_core = build_module(
+        "Qt.QtCore",
+        QObject=QObject,
+        Signal=Signal,
+        QEvent=QEvent,
+        Qt=build_module("Qt", AltModifier=0x08000000, LeftButton=1),
+    )
+    qt_gui = build_module("Qt.QtGui", QKeyEvent=type("QKeyEvent", (QEvent,), {}))
+    qt_widgets = build_module(
+        "Qt.QtWidgets",
+        QApplication=QApplication,
+        QLabel=type("QLabel", (QObject,), {}),
+        QWidget=type("QWidget", (QObject,), {}),
+    )
+    qt = build_module("Qt", QtCore=qt_core, QtGui=qt_gui, QtWidgets=qt_widgets)
+
+    sys.modules.update(
+        {
+            "maya": maya,
+            "maya.OpenMaya": open_maya,
+            "maya.OpenMayaMPx": open_maya_mpx,
+            "maya.OpenMayaUI": open_maya_ui,
+            "pymel": pymel,
+            "pymel.core": core,
+            "pymel.tools": tools,
+            "pymel.tools.py2mel": py2mel,
+            "Qt": qt,
+            "Qt.QtCore": qt_core,
+            "Qt.QtGui": qt_gui,
+            "Qt.QtWidgets": qt_widgets,
+        }
+    )
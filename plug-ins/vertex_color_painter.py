@@ -19,20 +19,30 @@ from __future__ import division
 from __future__ import print_function
 
 # Import built-in modules
+from collections import OrderedDict
 from collections import defaultdict
 from contextlib import contextmanager
 from functools import partial
+import ctypes
+import math
+import os
 import sys
+import weakref
 
 # Import third-party modules
 from Qt import QtCore
-from Qt import QtGui
 from Qt import QtWidgets
 from maya import OpenMaya
 from maya import OpenMayaMPx
 from maya import OpenMayaUI
 from pymel import core as pm
 from pymel.tools import py2mel
+import numpy
+
+# Import local modules
+import vertex_color_engine
+import vertex_color_io
+import vertex_color_profiler
 
 
 __author__ = "timmyliang"
@@ -45,52 +55,159 @@ SINGLE_CONTROL = "artAttrColorSingleColorChannel"
 OPTION_CONTROL = "artAttrColorSingleColorOptionMenu"
 CHANNELS = "RGBA"
 OPTION_ITEMS = ["Auto", "RGB"] + list(CHANNELS)
+HISTORY_BUDGET_OPTION = "vertexColorPainterHistoryBudget"
+HISTORY_BUDGET_DEFAULT = 256
+LAZY_CHANNELS_OPTION = "vertexColorPainterLazyChannels"
+KEEP_CHANNELS_OPTION = "vertexColorPainterKeepChannels"
+COMPACT_CHANNELS_OPTION = "vertexColorPainterCompactChannels"
+VIRTUAL_CHANNELS_OPTION = "vertexColorPainterVirtualChannels"
+SMOOTH_ITERATIONS_OPTION = "vertexColorPainterSmoothIterations"
+TRACE_PATH_OPTION = "vertexColorPainterTracePath"
+COLOR_HASH_ATTR = "vertexColorPainterHash"
+BRUSH_MARGIN = 1.5
+BRUSH_PADDING = 4
+DEPTH_TOLERANCE = 0.002
+BRUSH_RINGS = 1
+STREAM_CHUNK_SIZE = 65536
+PROFILER = vertex_color_profiler.StrokeProfiler()
+
+
+def get_option_var(name, default):
+    return pm.optionVar(q=name) if pm.optionVar(exists=name) else default
+
+
+class PaintNodeRegistry(object):
+    """Paint nodes and their color sets cached while the tool is active.
+
+    PyMEL keeps the ``MDagPath`` and ``MFnMesh`` of a ``PyNode``, so caching
+    the nodes is enough to reuse them. Selection change, color set change and
+    node removal callbacks drop the cached entries. Outside of a tool session
+    nothing is cached.
+    """
+
+    active = False
+    paint_nodes = None
+    nodes = {}
+    color_sets = {}
+    callback_ids = {}
 
+    @classmethod
+    def get_paint_nodes(cls):
+        if cls.paint_nodes is not None:
+            return cls.paint_nodes
+        names = set(pm.artAttrPaintVertexCtx(PAINT_CTX, q=1, pna=1).split())
+        paint_nodes = [cls.get_node(name) for name in names]
+        if cls.active:
+            cls.paint_nodes = paint_nodes
+        return paint_nodes
 
-def iterate_mit(itr):
-    while not itr.isDone():
-        yield itr
-        itr.next()
-
+    @classmethod
+    def get_node(cls, path):
+        """Return the ``PyNode`` of ``path`` or ``None`` if it does not exist."""
+        node = cls.nodes.get(path)
+        if node is not None:
+            return node
+        if not pm.objExists(path):
+            return None
+        node = pm.PyNode(path)
+        if cls.active:
+            cls.watch_node(node)
+            cls.nodes[path] = node
+        return node
 
-def use_select_depth(func):
-    """Activate Select Base on camera."""
+    @classmethod
+    def get_color_sets(cls, node):
+        path = node.fullPathName()
+        color_sets = cls.color_sets.get(path)
+        if color_sets is not None:
+            return color_sets
+        color_sets = pm.polyColorSet(node, q=1, allColorSets=1)
+        color_sets = color_sets or pm.polyColorSet(node, create=1)
+        if cls.active:
+            cls.color_sets[path] = color_sets
+        return color_sets
 
-    def decorator(*args, **kwargs):
-        is_use_depth = pm.selectPref(q=1, ud=1)
-        pm.selectPref(ud=True)
-        result = func(*args, **kwargs)
-        pm.selectPref(ud=is_use_depth)
-        return result
+    @classmethod
+    def invalidate(cls, *args):
+        cls.paint_nodes = None
+        cls.nodes = {}
+        cls.color_sets = {}
 
-    return decorator
+    @classmethod
+    def invalidate_selection(cls, *args):
+        cls.paint_nodes = None
 
+    @classmethod
+    def invalidate_color_sets(cls, path, node, name, flags, *args):
+        # NOTES(timmyliang): flags are added, deleted and current set changed
+        if flags[0] or flags[1]:
+            cls.color_sets.pop(path, None)
 
-def to_component_mode(func):
-    """Convert Selection to Component mode."""
+    @classmethod
+    def watch(cls):
+        cls.active = True
+        if "SelectionChanged" not in cls.callback_ids:
+            cls.callback_ids["SelectionChanged"] = [
+                OpenMaya.MEventMessage.addEventCallback(
+                    "SelectionChanged", cls.invalidate_selection
+                )
+            ]
 
-    def decorator(*args, **kwargs):
-        flags = ["co", "h", "l", "o", "p", "r", "t"]
-        select_modes = [flag for flag in flags if pm.selectMode(**{"q": 1, flag: 1})]
-        pm.selectMode(component=1)
-        # NOTES(timmyliang): update viewport
-        pm.refresh()
-        func(*args, **kwargs)
-        pm.selectMode(**{select_modes[0]: True})
+    @classmethod
+    def watch_node(cls, node):
+        mobject = node.__apimobject__()
+        # NOTES(timmyliang): a node recreated at the same path needs new callbacks
+        handle = OpenMaya.MObjectHandle(mobject).hashCode()
+        if handle in cls.callback_ids:
+            return
+        cls.callback_ids[handle] = [
+            OpenMaya.MPolyMessage.addColorSetChangedCallback(
+                mobject, partial(cls.invalidate_color_sets, node.fullPathName())
+            ),
+            OpenMaya.MNodeMessage.addNodePreRemovalCallback(mobject, cls.invalidate),
+        ]
 
-    return decorator
+    @classmethod
+    def clear(cls):
+        for callback_ids in cls.callback_ids.values():
+            for callback_id in callback_ids:
+                OpenMaya.MMessage.removeCallback(callback_id)
+        cls.callback_ids = {}
+        cls.active = False
+        cls.invalidate()
 
 
 class ApplyVertexColorBase(object):
+
+    color_set_representation = {
+        "R": "RGB",
+        "G": "RGB",
+        "B": "RGB",
+        "A": "A",
+    }
+    compact_channels = False
+
     @staticmethod
     def get_paint_nodes():
-        for node in set(pm.artAttrPaintVertexCtx(PAINT_CTX, q=1, pna=1).split()):
-            yield pm.PyNode(node)
+        return PaintNodeRegistry.get_paint_nodes()
 
     @staticmethod
     def get_color_sets(node):
-        color_sets = pm.polyColorSet(node, q=1, allColorSets=1)
-        return color_sets or pm.polyColorSet(node, create=1)
+        return PaintNodeRegistry.get_color_sets(node)
+
+    @staticmethod
+    def get_main_color_set(node):
+        """Return the main color set of ``node``, ``None`` if it has no colors.
+
+        Unlike ``get_color_sets`` no color set is created, batch commands skip
+        uncolored meshes instead of adding a set to them.
+        """
+        color_sets = []
+        node.__apimfn__().getColorSetNames(color_sets)
+        if not color_sets:
+            pm.displayWarning("Skip {0}, it has no color set".format(node))
+            return None
+        return color_sets[0]
 
     @staticmethod
     def filter_color(color, index, base_color=None):
@@ -101,64 +218,591 @@ class ApplyVertexColorBase(object):
         color_list[index] = color[index]
         return OpenMaya.MColor(*color_list)
 
+    @staticmethod
+    def read_color_pointer(mesh, color_set):
+        """Copy a color set to native memory.
+
+        The whole set is copied through an ``MColorArray`` and an
+        ``MScriptUtil`` buffer, sized by a transient Python list of ``4N``
+        floats. Maya API 1.0 has no partial read.
+
+        Returns:
+            tuple: ``(util, ptr, count)``, ``ptr`` stays valid as long as
+                ``util`` is alive.
+        """
+        color_array = OpenMaya.MColorArray()
+        mesh.getVertexColors(color_array, color_set)
+        count = color_array.length()
+        util = OpenMaya.MScriptUtil()
+        util.createFromList([0.0] * (count * 4), count * 4)
+        ptr = util.asFloat4Ptr()
+        color_array.get(ptr)
+        return util, ptr, count
+
+    @classmethod
+    def read_color_buffer(cls, mesh, color_set):
+        """Read a whole color set into a ``(N, 4)`` float32 buffer."""
+        _, ptr, count = cls.read_color_pointer(mesh, color_set)
+        return vertex_color_engine.buffer_from_address(int(ptr), count)
+
+    @classmethod
+    def iter_color_chunks(cls, mesh, color_set, chunk_size):
+        """Yield a color set as ``(chunk_size, 4)`` float32 buffers.
+
+        Only the numpy copies are chunked, see ``read_color_pointer``.
+        """
+        # NOTE(timmyliang): keep ``util`` referenced, it owns the memory of ``ptr``
+        util, ptr, count = cls.read_color_pointer(mesh, color_set)
+        row_bytes = numpy.dtype(numpy.float32).itemsize
+        row_bytes *= vertex_color_engine.CHANNEL_COUNT
+        for start in range(0, count, chunk_size):
+            yield vertex_color_engine.buffer_from_address(
+                int(ptr) + start * row_bytes, min(chunk_size, count - start)
+            )
+
+    @staticmethod
+    def write_color_buffer(mesh, color_set, colors, vertex_ids):
+        """Write ``colors`` to ``vertex_ids`` of ``color_set`` in one call."""
+        count = len(vertex_ids)
+        if not count:
+            return
+        util = OpenMaya.MScriptUtil()
+        util.createFromList(numpy.ravel(colors).tolist(), count * 4)
+        color_array = OpenMaya.MColorArray(util.asFloat4Ptr(), count)
+        vtx_array = OpenMaya.MIntArray()
+        vtx_list = numpy.asarray(vertex_ids).tolist()
+        OpenMaya.MScriptUtil.createIntArrayFromList(vtx_list, vtx_array)
+        mesh.setCurrentColorSetName(color_set)
+        mesh.setVertexColors(color_array, vtx_array)
+        PROFILER.count("bytes", count * 4 * 4)
+
+    @classmethod
+    def get_representation(cls, color_channel):
+        if cls.compact_channels:
+            return "A"
+        return cls.color_set_representation[color_channel]
+
+    @classmethod
+    def get_channel_slot(cls, color_channel):
+        """Return the column holding ``color_channel`` in its ``VertexColor{X}`` set.
+
+        Alpha only sets keep the value in the alpha slot.
+        """
+        if cls.get_representation(color_channel) == "A":
+            return CHANNELS.index("A")
+        return CHANNELS.index(color_channel)
+
+    @classmethod
+    def write_channel_buffers(
+        cls, mesh, color_sets, colors, vertex_ids, channels=CHANNELS
+    ):
+        """Sync the existing ``VertexColor{X}`` sets from main ``colors``."""
+        for color_channel in channels:
+            color_set = "VertexColor{0}".format(color_channel)
+            if color_set not in color_sets:
+                continue
+            channel_index = CHANNELS.index(color_channel)
+            slot = cls.get_channel_slot(color_channel)
+            channel_colors = vertex_color_engine.extract_channel(
+                colors, channel_index, slot
+            )
+            cls.write_color_buffer(mesh, color_set, channel_colors, vertex_ids)
+
+    @classmethod
+    def apply_color_delta(cls, path, vertex_ids, colors):
+        """Write ``colors`` back to ``vertex_ids`` of the main and channel sets."""
+        node = PaintNodeRegistry.get_node(path)
+        if node is None:
+            return
+        mesh = node.__apimfn__()
+        color_sets = cls.get_color_sets(node)
+        current_color_set = mesh.currentColorSetName()
+        with PROFILER.phase("apply_color_delta", mesh=path, vertices=len(vertex_ids)):
+            cls.write_color_buffer(mesh, color_sets[0], colors, vertex_ids)
+            cls.write_channel_buffers(mesh, color_sets, colors, vertex_ids)
+        mesh.setCurrentColorSetName(current_color_set)
+
+    @staticmethod
+    def get_channel(arg_data, flag, index=0):
+        channel = arg_data.flagArgumentString(flag, index).upper()
+        if channel not in CHANNELS:
+            raise RuntimeError("Invalid channel for {0}: {1}".format(flag, channel))
+        return CHANNELS.index(channel)
+
+    @classmethod
+    def get_selected_vertices(cls):
+        """Return ``{mesh path: vertex ids}`` of the selected meshes.
+
+        Meshes selected as objects map to ``None``, component selections are
+        converted to the vertices they use and take precedence over the
+        object selection of their mesh.
+        """
+        selected = OrderedDict()
+        for node in pm.ls(sl=1, dag=1, type="mesh", noIntermediate=1):
+            selected[node.fullPathName()] = None
+        # NOTES(timmyliang): vertices, edges and faces
+        components = pm.filterExpand(selectionMask=(31, 32, 34), expand=False)
+        if not components:
+            return selected
+        selection = OpenMaya.MSelectionList()
+        for vertices in pm.polyListComponentConversion(components, toVertex=1):
+            selection.add(vertices)
+        component_ids = defaultdict(list)
+        for index in range(selection.length()):
+            dag_path = OpenMaya.MDagPath()
+            component = OpenMaya.MObject()
+            selection.getDagPath(index, dag_path, component)
+            elements = OpenMaya.MIntArray()
+            OpenMaya.MFnSingleIndexedComponent(component).getElements(elements)
+            elements = AdjacencyCache.read_int_buffer(elements)
+            component_ids[dag_path.fullPathName()].append(elements)
+        for path, elements in component_ids.items():
+            selected[path] = numpy.unique(numpy.concatenate(elements))
+        return selected
+
+
+class VertexColorCommandBase(OpenMayaMPx.MPxCommand):
+
+    syntax_flags = ()
+
+    @classmethod
+    def command_name(cls):
+        return cls.__name__[0].lower() + cls.__name__[1:]
+
+    @classmethod
+    def creator(cls):
+        return OpenMayaMPx.asMPxPtr(cls())
+
+    @classmethod
+    def syntax_creator(cls):
+        syntax = OpenMaya.MSyntax()
+        for flag in cls.syntax_flags:
+            syntax.addFlag(*flag)
+        return syntax
+
+
+class VisibleVertexCache(object):
+    """Visible vertex ids and their viewport positions for the current camera.
+
+    Vertices are projected through the view and camera matrices and depth
+    tested against the viewport depth map, without touching the selection.
+    Results are keyed by the camera, viewport size and the topology and
+    transform of the paint meshes. Camera, transform and topology callbacks
+    drop them as soon as the view changes.
+    """
+
+    view_key = None
+    depth_map = None
+    visible_vertices = {}
+    callback_ids = {}
+
+    @staticmethod
+    def get_matrix_rows(matrix):
+        return [[matrix(row, column) for column in range(4)] for row in range(4)]
+
+    @classmethod
+    def get_matrix_key(cls, dag_path):
+        rows = cls.get_matrix_rows(dag_path.inclusiveMatrix())
+        return tuple(value for row in rows for value in row)
+
+    @classmethod
+    def get_view_key(cls, view, dag_paths):
+        camera_path = OpenMaya.MDagPath()
+        view.getCamera(camera_path)
+        camera = OpenMaya.MFnCamera(camera_path)
+        cls.watch_dag_path(camera_path)
+        mesh_keys = []
+        for dag_path in dag_paths:
+            cls.watch_dag_path(dag_path, is_mesh=True)
+            mesh = OpenMaya.MFnMesh(dag_path)
+            mesh_keys.append(
+                (
+                    dag_path.fullPathName(),
+                    mesh.numVertices(),
+                    mesh.numPolygons(),
+                    mesh.numFaceVertices(),
+                    cls.get_matrix_key(dag_path),
+                )
+            )
+        return (
+            camera_path.fullPathName(),
+            cls.get_matrix_key(camera_path),
+            camera.isOrtho(),
+            camera.orthoWidth(),
+            camera.horizontalFieldOfView(),
+            view.portWidth(),
+            view.portHeight(),
+            tuple(sorted(mesh_keys)),
+        )
+
+    @classmethod
+    def get_visible_vertices(cls, view, dag_paths):
+        """Return ``(vertex_ids, screen)`` of each mesh visible in ``view``."""
+        view_key = cls.get_view_key(view, dag_paths)
+        if view_key != cls.view_key:
+            cls.invalidate()
+            cls.view_key = view_key
+        for dag_path in dag_paths:
+            path = dag_path.fullPathName()
+            if path not in cls.visible_vertices:
+                cls.visible_vertices[path] = cls.project_vertices(view, dag_path)
+        return cls.visible_vertices
+
+    @classmethod
+    def project_vertices(cls, view, dag_path):
+        mesh = OpenMaya.MFnMesh(dag_path)
+        points = vertex_color_engine.buffer_from_address(
+            int(mesh.getRawPoints()), mesh.numVertices(), columns=3
+        )
+        view_matrix = OpenMaya.MMatrix()
+        projection_matrix = OpenMaya.MMatrix()
+        view.modelViewMatrix(view_matrix)
+        view.projectionMatrix(projection_matrix)
+        matrix = OpenMaya.MMatrix(dag_path.inclusiveMatrix())
+        matrix = numpy.array(
+            cls.get_matrix_rows(matrix * view_matrix * projection_matrix)
+        )
+        screen, depth, inside = vertex_color_engine.project_points(
+            points, matrix, view.portWidth(), view.portHeight()
+        )
+
+        depth_map = cls.get_depth_map(view)
+        # NOTES(timmyliang): keep occluded vertices if depth map is unavailable
+        if depth_map is not None:
+            inside &= vertex_color_engine.depth_test(
+                screen, depth, depth_map, DEPTH_TOLERANCE
+            )
+        vtx_ids = numpy.flatnonzero(inside).astype(numpy.int32)
+        return vtx_ids, screen[vtx_ids]
+
+    @classmethod
+    def get_depth_map(cls, view):
+        if cls.depth_map is not None:
+            return cls.depth_map
+        width, height = view.portWidth(), view.portHeight()
+        # NOTES(timmyliang): a 4 bytes per pixel image holds one float per pixel
+        image = OpenMaya.MImage()
+        image.create(width, height, 4, OpenMaya.MImage.kByte)
+        ptr = image.pixels()
+        depth_type = OpenMayaUI.M3dView.kDepth_Float
+        try:
+            view.readDepthMap(0, 0, width, height, ptr, depth_type)
+        except RuntimeError:
+            return None
+        cls.depth_map = vertex_color_engine.buffer_from_address(
+            int(ptr), height, columns=width
+        )
+        return cls.depth_map
+
+    @classmethod
+    def invalidate(cls, *args):
+        cls.view_key = None
+        cls.depth_map = None
+        cls.visible_vertices = {}
+
+    @classmethod
+    def watch_dag_path(cls, dag_path, is_mesh=False):
+        path = dag_path.fullPathName()
+        if path in cls.callback_ids:
+            return
+        add_matrix_callback = OpenMaya.MDagMessage.addWorldMatrixModifiedCallback
+        callback_ids = [add_matrix_callback(dag_path, cls.invalidate)]
+        if is_mesh:
+            callback_ids.append(
+                OpenMaya.MPolyMessage.addPolyTopologyChangedCallback(
+                    dag_path.node(), cls.invalidate
+                )
+            )
+        cls.callback_ids[path] = callback_ids
+
+    @classmethod
+    def watch_panels(cls):
+        for panel in pm.getPanel(type="modelPanel") or []:
+            if panel in cls.callback_ids:
+                continue
+            callback_id = OpenMayaUI.MUiMessage.addCameraChangedCallback(
+                panel, cls.invalidate
+            )
+            cls.callback_ids[panel] = [callback_id]
+
+    @classmethod
+    def clear(cls):
+        for callback_ids in cls.callback_ids.values():
+            for callback_id in callback_ids:
+                OpenMaya.MMessage.removeCallback(callback_id)
+        cls.callback_ids = {}
+        cls.invalidate()
+
+
+class PaintUIState(object):
+    """Brush color and channel options mirrored from the tool settings UI.
+
+    Channel options are read when the tool is activated and kept in sync by
+    the control callbacks. The brush color is read back from the paint
+    context on press, whatever changed it: sliders, tool sync or scripts.
+    """
+
+    color = (0, 0, 0, 1.0)
+    channel_index = 0
+    display_mode = "Auto"
+    ctx_color = None
+
+    @classmethod
+    def refresh(cls):
+        cls.refresh_color()
+        cls.refresh_channel()
+        if pm.optionMenuGrp(OPTION_CONTROL, q=1, ex=1):
+            cls.display_mode = pm.optionMenuGrp(OPTION_CONTROL, q=1, v=1)
+
+    @classmethod
+    def refresh_color(cls, *args):
+        # NOTES(timmyliang): between strokes the context holds the user color
+        color = pm.artAttrPaintVertexCtx(PAINT_CTX, q=1, cl4=1)
+        if color:
+            cls.color = cls.ctx_color = tuple(color)
+
+    @classmethod
+    def refresh_channel(cls, *args):
+        if pm.radioButtonGrp(SINGLE_CONTROL, q=1, ex=1):
+            cls.channel_index = pm.radioButtonGrp(SINGLE_CONTROL, q=1, sl=1)
+
+    @classmethod
+    def get_mode(cls):
+        return OPTION_ITEMS[cls.channel_index + 1]
+
+    @classmethod
+    def set_ctx_color(cls, color):
+        """Edit the paint context color only when it differs."""
+        color = tuple(color)
+        if color != cls.ctx_color:
+            pm.artAttrPaintVertexCtx(PAINT_CTX, e=1, cl4=color)
+            cls.ctx_color = color
+
+
+class AdjacencyCache(object):
+    """CSR vertex adjacency of the meshes, built from their face vertices.
+
+    Adjacency is cached by topology hash so meshes sharing a topology share
+    it. Each mesh path remembers its topology hash along with its component
+    counts, until a topology changed callback drops it.
+    """
+
+    topologies = {}
+    mesh_topologies = {}
+    callback_ids = {}
+
+    @staticmethod
+    def read_int_buffer(int_array):
+        count = int_array.length()
+        util = OpenMaya.MScriptUtil()
+        util.createFromList([0] * count, count)
+        ptr = util.asIntPtr()
+        int_array.get(ptr)
+        buffer = vertex_color_engine.buffer_from_address(
+            int(ptr), count, columns=1, ctype=ctypes.c_int32
+        )
+        return buffer.ravel()
+
+    @staticmethod
+    def get_count_key(mesh):
+        return mesh.numVertices(), mesh.numPolygons(), mesh.numFaceVertices()
+
+    @classmethod
+    def read_topology(cls, dag_path):
+        """Return the ``(counts, connects)`` face vertex layout of a mesh."""
+        counts = OpenMaya.MIntArray()
+        connects = OpenMaya.MIntArray()
+        OpenMaya.MFnMesh(dag_path).getVertices(counts, connects)
+        return cls.read_int_buffer(counts), cls.read_int_buffer(connects)
+
+    @classmethod
+    def get_topology_hash(cls, dag_path):
+        mesh = OpenMaya.MFnMesh(dag_path)
+        count_key = cls.get_count_key(mesh)
+        path = dag_path.fullPathName()
+        cached = cls.mesh_topologies.get(path)
+        if cached and cached[0] == count_key:
+            return cached[1]
+
+        # NOTES(timmyliang): the previous topology of this mesh may be unused now
+        cls.invalidate(path)
+        topology_hash = vertex_color_engine.topology_hash(*cls.read_topology(dag_path))
+        cls.mesh_topologies[path] = (count_key, topology_hash)
+        if path not in cls.callback_ids:
+            add_topology_callback = OpenMaya.MPolyMessage.addPolyTopologyChangedCallback
+            cls.callback_ids[path] = add_topology_callback(
+                dag_path.node(), partial(cls.invalidate, path)
+            )
+        return topology_hash
+
+    @classmethod
+    def get_adjacency(cls, dag_path):
+        """Return the ``(offsets, neighbors)`` CSR adjacency of a mesh."""
+        topology_hash = cls.get_topology_hash(dag_path)
+        if topology_hash not in cls.topologies:
+            counts, connects = cls.read_topology(dag_path)
+            cls.topologies[topology_hash] = vertex_color_engine.build_adjacency(
+                counts, connects, OpenMaya.MFnMesh(dag_path).numVertices()
+            )
+        return cls.topologies[topology_hash]
+
+    @classmethod
+    def grow(cls, dag_path, vertex_ids, rings=1):
+        offsets, neighbors = cls.get_adjacency(dag_path)
+        return vertex_color_engine.grow_vertices(offsets, neighbors, vertex_ids, rings)
+
+    @classmethod
+    def invalidate(cls, path, *args):
+        _, topology_hash = cls.mesh_topologies.pop(path, (None, None))
+        # NOTES(timmyliang): release the adjacency once no mesh uses it
+        used_hashes = [cached[1] for cached in cls.mesh_topologies.values()]
+        if topology_hash not in used_hashes:
+            cls.topologies.pop(topology_hash, None)
+
+    @classmethod
+    def clear(cls):
+        for callback_id in cls.callback_ids.values():
+            OpenMaya.MMessage.removeCallback(callback_id)
+        cls.callback_ids = {}
+        cls.topologies = {}
+        cls.mesh_topologies = {}
+
 
 class AppVertexColorFilter(ApplyVertexColorBase, QtCore.QObject):
     pressed = QtCore.Signal()
+    moved = QtCore.Signal()
     released = QtCore.Signal()
     property_showed = QtCore.Signal()
     inst = None
-
-    color_set_representation = {
-        "R": "RGB",
-        "G": "RGB",
-        "B": "RGB",
-        "A": "A",
-    }
+    virtual_channels = False
 
     def __init__(self, *args, **kwargs):
         super(AppVertexColorFilter, self).__init__(*args, **kwargs)
         self.is_press_alt = False
+        self.stroke_viewport = None
+        self.viewports = []
+        self.tool_settings = None
+        self.callback_ids = []
+        self.viewport_cache = weakref.WeakKeyDictionary()
+        self.cursor = (0.5, 0.5)
         self.pressed.connect(self.press_viewport)
-        # NOTE(timmyliang): collect viewport color set
-        self.pressed.connect(ApplyVertexColorCommand.collect_viewport_vertex_ids)
+        # NOTE(timmyliang): collect brush footprint color set
+        collect = ApplyVertexColorCommand.collect_viewport_vertex_ids
+        self.pressed.connect(lambda: collect(self.cursor))
+        self.moved.connect(lambda: collect(self.cursor, grow=True))
+        # NOTES(timmyliang): the last moves may be skipped, collect once more
+        self.released.connect(lambda: collect(self.cursor, grow=True))
         self.released.connect(lambda: pm.evalDeferred(self.release_viewport))
         self.property_showed.connect(lambda: pm.evalDeferred(self.modify_property_window))
-        self.color = (0, 0, 0, 1.0)
 
     @classmethod
     def setup_color_set(cls):
+        channels = CHANNELS
+        # NOTE(timmyliang): virtual mode only keep the channels in use
+        cls.virtual_channels = bool(get_option_var(VIRTUAL_CHANNELS_OPTION, 0))
+        # NOTE(timmyliang): lazy mode only build the channels in use
+        if cls.virtual_channels or get_option_var(LAZY_CHANNELS_OPTION, 0):
+            channels = cls.get_active_channels()
+        keep_channels = get_option_var(KEEP_CHANNELS_OPTION, 0)
+        # NOTE(timmyliang): compact mode store a single value per vertex
+        ApplyVertexColorBase.compact_channels = bool(
+            get_option_var(COMPACT_CHANNELS_OPTION, 0)
+        )
         for node in cls.get_paint_nodes():
             node.displayColors.set(1)
-            color_sets = cls.get_color_sets(node)
-            main_color_set = color_sets[0]
+            node.__apimfn__().updateSurface()
+            if keep_channels:
+                cls.drop_mismatched_channel_sets(node)
+            # NOTE(timmyliang): kept channel sets still match the main color set
+            is_matched = keep_channels and node.hasAttr(COLOR_HASH_ATTR)
+            if is_matched:
+                color_hash = node.attr(COLOR_HASH_ATTR).get()
+                is_matched = color_hash == cls.get_color_hash(node)
+            cls.create_channel_sets(node, channels, refresh=not is_matched)
+            if cls.virtual_channels:
+                cls.prune_channel_sets(node, channels)
 
-            mesh = node.__apimfn__()
-            mesh.updateSurface()
-            color_array = OpenMaya.MColorArray()
-            mesh.getVertexColors(color_array, main_color_set)
+    @classmethod
+    def create_channel_sets(cls, node, channels=CHANNELS, refresh=True):
+        """Create the ``VertexColor{X}`` sets and fill them from the main set.
 
-            vtx_array = OpenMaya.MIntArray()
-            vtx_list = range(color_array.length())
-            OpenMaya.MScriptUtil.createIntArrayFromList(vtx_list, vtx_array)
+        Existing sets are only filled again when ``refresh`` is enabled.
+        """
+        color_sets = cls.get_color_sets(node)
+        fill_channels = ""
+        for color_channel in channels:
+            color_set = "VertexColor{0}".format(color_channel)
+            if color_set not in color_sets:
+                rpt = cls.get_representation(color_channel)
+                pm.polyColorSet(node, create=1, rpt=rpt, colorSet=color_set)
+                color_sets.append(color_set)
+            elif not refresh:
+                continue
+            fill_channels += color_channel
+        if not fill_channels:
+            return
 
-            final_colors = OpenMaya.MColorArray()
-            for channel_index, color_channel in enumerate(CHANNELS):
-                color_set = "VertexColor{0}".format(color_channel)
-                if color_set not in color_sets:
-                    rpt = cls.color_set_representation.get(color_channel)
-                    pm.polyColorSet(node, create=1, rpt=rpt, colorSet=color_set)
-                mesh.setCurrentColorSetName(color_set)
-                final_colors.clear()
-                for array_index in vtx_array:
-                    full_color = color_array[array_index]
-                    color = cls.filter_color(full_color, index=channel_index)
-                    final_colors.append(color)
-                mesh.setVertexColors(final_colors, vtx_array)
-            mesh.setCurrentColorSetName(main_color_set)
+        mesh = node.__apimfn__()
+        current_color_set = mesh.currentColorSetName()
+        main_colors = cls.read_color_buffer(mesh, color_sets[0])
+        vtx_ids = numpy.arange(len(main_colors), dtype=numpy.int32)
+        cls.write_channel_buffers(mesh, color_sets, main_colors, vtx_ids, fill_channels)
+        mesh.setCurrentColorSetName(current_color_set)
+
+    @classmethod
+    def prune_channel_sets(cls, node, channels):
+        """Delete the ``VertexColor{X}`` sets of the channels not in ``channels``."""
+        color_sets = cls.get_color_sets(node)
+        for color_channel in CHANNELS:
+            color_set = "VertexColor{0}".format(color_channel)
+            if color_channel not in channels and color_set in color_sets:
+                pm.polyColorSet(node, delete=1, colorSet=color_set)
+
+    @classmethod
+    def prune_inactive_channel_sets(cls):
+        """Keep only the channel sets painted or displayed in virtual mode."""
+        if not cls.virtual_channels:
+            return
+        channels = cls.get_active_channels()
+        for node in cls.get_paint_nodes():
+            cls.prune_channel_sets(node, channels)
+
+    @classmethod
+    def drop_mismatched_channel_sets(cls, node):
+        """Delete kept channel sets built with another representation."""
+        color_sets = cls.get_color_sets(node)
+        for color_channel in CHANNELS:
+            color_set = "VertexColor{0}".format(color_channel)
+            if color_set not in color_sets:
+                continue
+            rpt = pm.polyColorSet(node, q=1, representation=1, colorSet=color_set)
+            if rpt != cls.get_representation(color_channel):
+                pm.polyColorSet(node, delete=1, colorSet=color_set)
+
+    @staticmethod
+    def get_active_channels():
+        """Return the channels selected for painting or display."""
+        modes = [PaintUIState.get_mode(), PaintUIState.display_mode]
+        return "".join(channel for channel in CHANNELS if channel in modes)
+
+    @classmethod
+    def get_color_hash(cls, node):
+        main_color_set = cls.get_color_sets(node)[0]
+        main_colors = cls.read_color_buffer(node.__apimfn__(), main_color_set)
+        return vertex_color_engine.color_hash(main_colors)
 
     @classmethod
     def reset_color_set(cls):
+        keep_channels = get_option_var(KEEP_CHANNELS_OPTION, 0)
         for node in cls.get_paint_nodes():
+            if keep_channels:
+                if not node.hasAttr(COLOR_HASH_ATTR):
+                    node.addAttr(COLOR_HASH_ATTR, dataType="string")
+                node.attr(COLOR_HASH_ATTR).set(cls.get_color_hash(node))
+                continue
+            if node.hasAttr(COLOR_HASH_ATTR):
+                pm.deleteAttr(node, attribute=COLOR_HASH_ATTR)
+
             color_sets = cls.get_color_sets(node)
             for color_channel in CHANNELS:
                 color_set = "VertexColor{0}".format(color_channel)
@@ -169,8 +813,17 @@ class AppVertexColorFilter(ApplyVertexColorBase, QtCore.QObject):
     def install(cls):
         if not cls.inst:
             cls.inst = cls()
-            app = QtWidgets.QApplication.instance()
-            app.installEventFilter(cls.inst)
+            cls.inst.watch_tool_settings()
+            # NOTES(timmyliang): filter the viewports of panels created later on
+            cls.inst.callback_ids.append(
+                OpenMaya.MEventMessage.addEventCallback(
+                    "modelEditorChanged", cls.inst.watch_viewports
+                )
+            )
+        cls.inst.watch_viewports()
+        PaintUIState.refresh()
+        cls.inst.property_showed.emit()
+        PaintNodeRegistry.watch()
         pm.evalDeferred(cls.inst.setup_color_set, lp=1)
 
     @classmethod
@@ -178,47 +831,103 @@ class AppVertexColorFilter(ApplyVertexColorBase, QtCore.QObject):
         if not cls.inst:
             return
 
-        app = QtWidgets.QApplication.instance()
-        app.removeEventFilter(cls.inst)
+        for callback_id in cls.inst.callback_ids:
+            OpenMaya.MMessage.removeCallback(callback_id)
+        cls.inst.unwatch_widgets()
+        VisibleVertexCache.clear()
+        AdjacencyCache.clear()
         cls.inst.reset_color_set()
+        PaintNodeRegistry.clear()
         cls.inst.deleteLater()
         cls.inst = None
 
+    def watch_viewports(self, *args):
+        """Filter the events of the viewport widget in every model panel."""
+        for panel in pm.getPanel(type="modelPanel") or []:
+            editor = pm.uitypes.toQtObject(pm.modelPanel(panel, q=1, modelEditor=1))
+            if not editor:
+                continue
+            for viewport in editor.findChildren(QtWidgets.QWidget):
+                if viewport in self.viewports or not self.is_viewport(viewport):
+                    continue
+                viewport.installEventFilter(self)
+                self.viewports.append(viewport)
+        VisibleVertexCache.watch_panels()
+
+    def watch_tool_settings(self):
+        # NOTES(timmyliang): rebuild the property window when tool settings show up
+        self.tool_settings = pm.uitypes.toQtObject("ToolSettings")
+        if self.tool_settings:
+            self.tool_settings.installEventFilter(self)
+
+    def unwatch_widgets(self):
+        widgets = self.viewports + [self.tool_settings]
+        for widget in filter(None, widgets):
+            try:
+                widget.removeEventFilter(self)
+            except RuntimeError:
+                # NOTES(timmyliang): widget is already deleted with its panel
+                pass
+        self.viewports = []
+        self.tool_settings = None
+
     def eventFilter(self, receiver, event):
-        if event.type() == QtCore.QEvent.MouseButtonPress:
-            if self.is_viewport(receiver) and not self.is_press_alt:
+        if receiver is self.tool_settings:
+            if event.type() == QtCore.QEvent.Show and pm.currentCtx() == PAINT_CTX:
+                self.property_showed.emit()
+        elif event.type() == QtCore.QEvent.MouseMove:
+            if receiver is self.stroke_viewport:
+                self.update_cursor(receiver, event)
+                self.moved.emit()
+        elif event.type() == QtCore.QEvent.MouseButtonPress:
+            # NOTES(timmyliang): alt drag is camera navigation
+            self.is_press_alt = event.modifiers() == QtCore.Qt.AltModifier
+            if not self.is_press_alt:
+                self.stroke_viewport = receiver
+                self.update_cursor(receiver, event)
+                PROFILER.instant("eventFilter.press")
                 self.pressed.emit()
         elif event.type() == QtCore.QEvent.MouseButtonRelease:
-            if self.is_viewport(receiver) and not self.is_press_alt:
+            if receiver is self.stroke_viewport:
+                self.update_cursor(receiver, event)
+            self.stroke_viewport = None
+            if not self.is_press_alt:
+                PROFILER.instant("eventFilter.release")
                 self.released.emit()
-        elif isinstance(event, QtGui.QKeyEvent) and not event.isAutoRepeat():
-            # NOTES(timmyliang): check alt key press
-            self.is_press_alt = event.modifiers() == QtCore.Qt.AltModifier
-        # NOTES(timmyliang): hack maya properties window open
-        elif event.type() == QtCore.QEvent.WinIdChange:
-            label = receiver.findChild(QtWidgets.QLabel)
-            if label and pm.currentCtx() == "artAttrColorPerVertexContext":
-                self.property_showed.emit()
         return False
 
+    def update_cursor(self, viewport, event):
+        """Keep the cursor position normalized to the viewport size."""
+        pos = event.pos()
+        self.cursor = (pos.x() / viewport.width(), pos.y() / viewport.height())
+
     def is_viewport(self, viewport):
-        panel = isinstance(viewport, QtCore.QObject) and viewport.parent()
+        if not isinstance(viewport, QtCore.QObject):
+            return False
+        panel = viewport.parent()
         name = panel and panel.objectName()
-        return name and pm.objectTypeUI(name, i="modelEditor")
-
+        # NOTES(timmyliang): objectTypeUI is a mel round trip, only ask again on rename
+        cached = self.viewport_cache.get(viewport)
+        if cached and cached[0] == name:
+            return cached[1]
+        is_viewport = bool(name and pm.objectTypeUI(name, i="modelEditor"))
+        self.viewport_cache[viewport] = (name, is_viewport)
+        return is_viewport
+
+    @PROFILER.timed("press_viewport")
     def press_viewport(self):
-        rgb = pm.colorSliderGrp("colorPerVertexColor", q=1, rgb=1)
-        alpha = pm.floatSliderGrp("colorPerVertexAlpha", q=1, value=1)
-        rgb.append(alpha)
-
-        self.color = rgb or self.color
-        index = pm.radioButtonGrp(SINGLE_CONTROL, q=1, sl=1)
-        channel = index - 1
-        color = self.filter_color(self.color, index=channel) if channel - 1 >= 0 else self.color
-        pm.artAttrPaintVertexCtx(PAINT_CTX, e=1, cl4=tuple(color))
+        PaintUIState.refresh_color()
+        color = PaintUIState.color
+        channel = PaintUIState.channel_index - 1
+        if channel >= 0 and self.compact_channels:
+            # NOTE(timmyliang): compact channel sets are painted through alpha
+            color = (0, 0, 0, color[channel])
+        elif channel - 1 >= 0:
+            color = self.filter_color(color, index=channel)
+        PaintUIState.set_ctx_color(color)
 
         # NOTE(timmyliang): change color set
-        mode = OPTION_ITEMS[index + 1]
+        mode = PaintUIState.get_mode()
         if mode == "Auto":
             return
         for node in self.get_paint_nodes():
@@ -228,12 +937,14 @@ class AppVertexColorFilter(ApplyVertexColorBase, QtCore.QObject):
                 color_sets = self.get_color_sets(node)
                 color_set = color_sets[0]
             else:
+                self.create_channel_sets(node, mode, refresh=False)
                 color_set = "VertexColor{0}".format(mode)
             node.setCurrentColorSetName(color_set)
 
+    @PROFILER.timed("release_viewport")
     def release_viewport(self):
         # NOTE(timmyliang): reset vertex color
-        pm.artAttrPaintVertexCtx(PAINT_CTX, e=1, cl4=self.color)
+        PaintUIState.set_ctx_color(PaintUIState.color)
 
         # NOTE(timmyliang): get color channel apply to main color set
         # self.apply_color_channel()
@@ -244,6 +955,9 @@ class AppVertexColorFilter(ApplyVertexColorBase, QtCore.QObject):
         # NOTES(timmyliang): avoid multiple ui modifications
         if pm.radioButtonGrp(SINGLE_CONTROL, q=1, ex=1):
             return
+        # NOTES(timmyliang): the tool settings may not be built yet
+        if not pm.radioButtonGrp("artAttrColorChannelChoices", q=1, ex=1):
+            return
         row_layout = pm.rowLayout(numberOfColumns=2)
         grp = pm.radioButtonGrp(
             label="Single Channel:",
@@ -275,170 +989,780 @@ class AppVertexColorFilter(ApplyVertexColorBase, QtCore.QObject):
                 pm.optionMenuGrp(
                     OPTION_CONTROL,
                     label="Color Display:",
-                    changeCommand=self.on_display_mode_change,
+                    changeCommand=self.on_display_option_change,
                 )
                 for option_item in OPTION_ITEMS:
                     pm.menuItem(label=option_item)
 
         pm.setUITemplate(popTemplate=1)
+        PaintUIState.refresh()
 
     def on_channel_change(self, *args):
-        if pm.optionMenuGrp(OPTION_CONTROL, q=1, sl=1) == 1:
-            index = pm.radioButtonGrp(SINGLE_CONTROL, q=1, sl=1)
-            channel = OPTION_ITEMS[index + 1]
+        PaintUIState.refresh_channel()
+        channel = PaintUIState.get_mode()
+        if channel in CHANNELS:
+            for node in self.get_paint_nodes():
+                self.create_channel_sets(node, channel, refresh=False)
+        if PaintUIState.display_mode == "Auto":
             self.on_display_mode_change(channel)
+        else:
+            self.prune_inactive_channel_sets()
+
+    def on_display_option_change(self, mode):
+        PaintUIState.display_mode = mode
+        self.on_display_mode_change(mode)
 
     @classmethod
     def on_display_mode_change(cls, mode):
         if mode == "Auto":
-            sel = pm.radioButtonGrp(SINGLE_CONTROL, q=1, sl=1)
-            mode = OPTION_ITEMS[sel + 1]
+            mode = PaintUIState.get_mode()
         for node in cls.get_paint_nodes():
             color_sets = cls.get_color_sets(node)
             main_color_set = color_sets[0]
             if mode == "RGB":
                 pm.polyColorSet(node, currentColorSet=1, colorSet=main_color_set)
             else:
+                cls.create_channel_sets(node, mode, refresh=False)
                 color_set = "VertexColor{0}".format(mode)
                 pm.polyColorSet(node, currentColorSet=1, colorSet=color_set)
+        cls.prune_inactive_channel_sets()
         # NOTE(timmyliang): update panel
         pm.mel.syncColorPerVertexTool()
 
 
-class ApplyVertexColorCommand(ApplyVertexColorBase, OpenMayaMPx.MPxCommand):
-
-    vertex_ids_data = defaultdict(OpenMaya.MIntArray)
-    vertex_color_data = defaultdict(lambda: defaultdict(OpenMaya.MColorArray))
-    chunk_num = 0
+class ApplyVertexColorCommand(ApplyVertexColorBase, VertexColorCommandBase):
 
-    @classmethod
-    def command_name(cls):
-        return cls.__name__[0].lower() + cls.__name__[1:]
+    vertex_ids_data = defaultdict(partial(numpy.zeros, 0, dtype=numpy.int32))
+    vertex_snapshot_data = {}
+    brush_center = (0, 0)
+    vertex_color_data = OrderedDict()
+    undone_steps = set()
+    # NOTES(timmyliang): steps are evicted oldest first, up to this step
+    evicted_step = 0
+    eviction_count = 0
+    step_count = 0
 
-    @classmethod
-    def creator(cls):
-        return OpenMayaMPx.asMPxPtr(cls())
+    def __init__(self):
+        super(ApplyVertexColorCommand, self).__init__()
+        self.step = None
+        self.mode = None
+        self.node_paths = []
+        self.color_deltas = {}
+        self.undoable = True
 
+    @PROFILER.timed("applyVertexColorCommand")
     def doIt(self, args):
-        return self.redoIt()
-
-    def undoIt(self):
-        self.__class__.chunk_num -= 1
-        for node in self.get_paint_nodes():
-            main_colors = self.vertex_color_data[self.chunk_num][node.fullPathName()]
-            if not main_colors.length():
+        self.mode = PaintUIState.get_mode()
+        # NOTE(timmyliang): artisan smooth blur the painted channel only
+        smooth_iterations = 0
+        if self.mode in CHANNELS:
+            operation = pm.artAttrPaintVertexCtx(PAINT_CTX, q=1, selectedattroper=1)
+            if operation == "smooth":
+                smooth_iterations = get_option_var(SMOOTH_ITERATIONS_OPTION, 1)
+        self.node_paths = [node.fullPathName() for node in self.get_paint_nodes()]
+        for path in self.node_paths:
+            main_colors = self.vertex_snapshot_data.pop(path, None)
+            node = PaintNodeRegistry.get_node(path)
+            colors = self.apply_color_channel(node, self.mode, smooth_iterations)
+            if colors is None:
                 continue
+            before_colors, final_colors = colors
+            vtx_ids = self.vertex_ids_data[path]
+            if self.mode == "RGB":
+                # NOTES(timmyliang): artisan has painted the main set, use the snapshot
+                if main_colors is None:
+                    continue
+                before_colors = main_colors[vtx_ids]
+            PROFILER.count("vertices", len(vtx_ids))
+            delta = vertex_color_engine.diff_colors(
+                vtx_ids, before_colors, final_colors
+            )
+            if len(delta.vertex_ids):
+                self.color_deltas[path] = delta
 
-            mesh = node.__apimfn__()
-            current_color_set = mesh.currentColorSetName()
-            color_sets = self.get_color_sets(node)
-            main_color_set = color_sets[0]
-            mesh.setCurrentColorSetName(main_color_set)
-            vtx_array = OpenMaya.MIntArray()
-            for vtx_index in range(main_colors.length()):
-                vtx_array.append(vtx_index)
-
-            mesh.setVertexColors(main_colors, vtx_array)
-            for channel_index, color_channel in enumerate(CHANNELS):
-                colors = OpenMaya.MColorArray()
-                color_set = "VertexColor{0}".format(color_channel)
-                mesh.setCurrentColorSetName(color_set)
-                for vtx_index in vtx_array:
-                    main_color = main_colors[vtx_index]
-                    color = self.filter_color(main_color, channel_index)
-                    colors.append(color)
-                mesh.setVertexColors(colors, vtx_array)
-            mesh.setCurrentColorSetName(current_color_set)
+        PROFILER.count("strokes")
+        is_empty = not self.color_deltas
+        self.step = self.add_step(self.color_deltas)
+        # NOTE(timmyliang): stroke alone exceeds the budget, keep it out of undo queue
+        self.undoable = is_empty or self.step in self.vertex_color_data
 
+    @PROFILER.timed("undo")
+    def undoIt(self):
+        self.undone_steps.add(self.step)
+        if self.step <= self.evicted_step:
+            pm.displayWarning("Paint history of this stroke was pruned by budget")
+            return
+        for path, delta in self.color_deltas.items():
+            self.apply_color_delta(path, delta.vertex_ids, delta.before)
+
+    @PROFILER.timed("redo")
     def redoIt(self):
-        self.__class__.chunk_num += 1
-        index = pm.radioButtonGrp(SINGLE_CONTROL, q=1, sl=1)
-        mode = OPTION_ITEMS[index + 1]
-        for node in self.get_paint_nodes():
-            self.apply_color_channel(node, mode)
+        self.undone_steps.discard(self.step)
+        for path, delta in self.color_deltas.items():
+            self.apply_color_delta(path, delta.vertex_ids, delta.after)
 
     @classmethod
-    def apply_color_channel(cls, node, mode):
-        is_rgb = mode == "RGB"
+    def apply_color_channel(cls, node, mode, smooth_iterations=0):
+        """Merge the painted channel of ``node`` into the main color set.
+
+        With ``smooth_iterations`` the channel of the main color set is
+        smoothed over the stroke vertices artisan has changed instead.
+
+        Returns:
+            tuple: ``(before_colors, final_colors)`` of the stroke vertices,
+                ``before_colors`` is only the stroke start in channel modes.
+        """
+        vtx_ids = cls.vertex_ids_data[node.fullPathName()]
+        if not len(vtx_ids):
+            return
 
         mesh = node.__apimfn__()
         color_sets = cls.get_color_sets(node)
         main_color_set = color_sets[0]
-
         current_color_set = mesh.currentColorSetName()
+        main_colors = cls.read_color_buffer(mesh, main_color_set)
+        before_colors = main_colors[vtx_ids]
 
-        main_colors = OpenMaya.MColorArray()
-        mesh.getVertexColors(main_colors, main_color_set)
-        vtx_array = cls.vertex_ids_data[node.fullPathName()]
-        final_colors = OpenMaya.MColorArray()
-
-        if is_rgb:
-            for channel_index, color_channel in enumerate(CHANNELS):
-                final_colors.clear()
-                color_set = "VertexColor{0}".format(color_channel)
-                mesh.setCurrentColorSetName(color_set)
-                for vtx_index in vtx_array:
-                    main_color = main_colors[vtx_index]
-                    color = cls.filter_color(main_color, channel_index)
-                    final_colors.append(color)
-                mesh.setVertexColors(final_colors, vtx_array)
-        else:
-            mode_index = OPTION_ITEMS.index(mode) - 2
-            channel_colors = OpenMaya.MColorArray()
-            fix_colors = OpenMaya.MColorArray()
-            color_set = "VertexColor{0}".format(mode)
-            mesh.getVertexColors(channel_colors, color_set)
-            for vtx_index in vtx_array:
-                channel_color = channel_colors[vtx_index]
-                main_color = main_colors[vtx_index]
-                color = cls.filter_color(channel_color, mode_index, main_color)
-                final_colors.append(color)
-                fix_color = cls.filter_color(channel_color, mode_index)
-                fix_colors.append(fix_color)
-
-            mesh.setVertexColors(fix_colors, vtx_array)
-            mesh.setCurrentColorSetName(main_color_set)
-            mesh.setVertexColors(final_colors, vtx_array)
+        path = node.fullPathName()
+        with PROFILER.phase("merge", mesh=path, mode=mode, vertices=len(vtx_ids)):
+            if mode == "RGB":
+                final_colors = main_colors[vtx_ids]
+                cls.write_channel_buffers(mesh, color_sets, final_colors, vtx_ids)
+            elif smooth_iterations:
+                channel_index = CHANNELS.index(mode)
+                # NOTES(timmyliang): only smooth the vertices artisan has touched
+                color_set = "VertexColor{0}".format(mode)
+                channel_colors = cls.read_color_buffer(mesh, color_set)
+                painted = channel_colors[vtx_ids, cls.get_channel_slot(mode)]
+                painted_ids = vtx_ids[painted != main_colors[vtx_ids, channel_index]]
+                dag_path = node.__apimdagpath__()
+                offsets, neighbors = AdjacencyCache.get_adjacency(dag_path)
+                smoothed_colors = vertex_color_engine.smooth_channel(
+                    vertex_color_engine.fill_unset_colors(main_colors),
+                    channel_index,
+                    offsets,
+                    neighbors,
+                    painted_ids,
+                    smooth_iterations,
+                )
+                main_colors[painted_ids] = smoothed_colors[painted_ids]
+                final_colors = main_colors[vtx_ids]
+                cls.write_color_buffer(mesh, main_color_set, final_colors, vtx_ids)
+                cls.write_channel_buffers(mesh, color_sets, final_colors, vtx_ids, mode)
+            else:
+                color_set = "VertexColor{0}".format(mode)
+                channel_colors = cls.read_color_buffer(mesh, color_set)
+                final_colors, fix_colors = vertex_color_engine.merge_channel(
+                    main_colors,
+                    channel_colors,
+                    vtx_ids,
+                    CHANNELS.index(mode),
+                    cls.get_channel_slot(mode),
+                )
+                cls.write_color_buffer(mesh, color_set, fix_colors, vtx_ids)
+                cls.write_color_buffer(mesh, main_color_set, final_colors, vtx_ids)
 
         mesh.setCurrentColorSetName(current_color_set)
+        return before_colors, final_colors
 
     @classmethod
-    @to_component_mode
-    @use_select_depth
-    def collect_viewport_vertex_ids(cls):
-        """Collect Viewport Paintable Component."""
-        selections = OpenMaya.MSelectionList()
-        component_selections = OpenMaya.MSelectionList()
-        OpenMaya.MGlobal.getActiveSelectionList(selections)
+    def collect_viewport_vertex_ids(cls, cursor, grow=False):
+        """Collect Paintable Component under the brush footprint.
 
+        ``cursor`` is normalized to the viewport size from the top left corner.
+        ``grow`` extends the collected stroke instead of starting a new one.
+        """
         view = OpenMayaUI.M3dView.active3dView()
-        OpenMaya.MGlobal.selectFromScreen(0, 0, view.portWidth(), view.portHeight(), OpenMaya.MGlobal.kReplaceList)
-        # NOTES(timmyliang): expand select index
-        pm.polySelectConstraint(pp=1)
-        pm.polySelectConstraint(pp=1)
-        OpenMaya.MGlobal.getActiveSelectionList(component_selections)
-        OpenMaya.MGlobal.setActiveSelectionList(selections)
-
-        for itr in iterate_mit(OpenMaya.MItSelectionList(component_selections)):
-            dag_path = OpenMaya.MDagPath()
-            component = OpenMaya.MObject()
-            itr.getDagPath(dag_path, component)
+        width, height = view.portWidth(), view.portHeight()
+        center_x, center_y = cursor[0] * width, (1 - cursor[1]) * height
+        brush_radius = cls.get_brush_screen_radius(view)
+        radius = brush_radius * BRUSH_MARGIN + BRUSH_PADDING
+
+        if grow:
+            last_x, last_y = cls.brush_center
+            # NOTES(timmyliang): brush still inside the last collected footprint
+            distance = math.hypot(center_x - last_x, center_y - last_y)
+            if distance < radius - brush_radius:
+                PROFILER.count("skipped_moves")
+                return
+        else:
+            cls.vertex_ids_data.clear()
+            cls.vertex_snapshot_data.clear()
+        cls.brush_center = (center_x, center_y)
+        cls.collect_brush_vertices(view, radius)
 
+    @classmethod
+    @PROFILER.timed("collect_viewport_vertex_ids")
+    def collect_brush_vertices(cls, view, radius):
+        """Add the visible vertices within ``radius`` of the brush center."""
+        mode = PaintUIState.get_mode()
+        # NOTES(timmyliang): reuse the vertices projected from the same camera
+        dag_paths = [node.__apimdagpath__() for node in cls.get_paint_nodes()]
+        visible_vertices = VisibleVertexCache.get_visible_vertices(view, dag_paths)
+        for dag_path in dag_paths:
+            path = dag_path.fullPathName()
+            vtx_ids, screen = visible_vertices[path]
+            in_brush = vertex_color_engine.points_in_radius(
+                screen, cls.brush_center, radius
+            )
+            if not in_brush.any():
+                continue
+            # NOTES(timmyliang): add a ring for the faces crossing the brush edge
+            vtx_ids = AdjacencyCache.grow(dag_path, vtx_ids[in_brush], BRUSH_RINGS)
+            vtx_ids = numpy.union1d(cls.vertex_ids_data[path], vtx_ids)
+            cls.vertex_ids_data[path] = vtx_ids
+            PROFILER.instant("collect", mesh=path, vertices=len(vtx_ids))
+            # NOTES(timmyliang): channel modes never write the main set during a stroke
+            if mode != "RGB" or path in cls.vertex_snapshot_data:
+                continue
+            # NOTE(timmyliang): colors before the stroke, sliced when it is applied
             mesh = OpenMaya.MFnMesh(dag_path)
             color_sets = []
             mesh.getColorSetNames(color_sets)
-            mesh.getVertexColors(
-                cls.vertex_color_data[cls.chunk_num][dag_path.fullPathName()],
-                color_sets[0],
-            )
-            vtx_array = cls.vertex_ids_data[dag_path.fullPathName()]
-            vtx_array.clear()
-            for vtx_itr in iterate_mit(OpenMaya.MItMeshVertex(dag_path, component)):
-                index = vtx_itr.index()
-                vtx_array.append(index)
+            cls.vertex_snapshot_data[path] = cls.read_color_buffer(mesh, color_sets[0])
+
+    @classmethod
+    def get_brush_screen_radius(cls, view):
+        """Estimate the brush radius in viewport pixels.
+
+        The world space radius is projected at the closest paint mesh bounding
+        box, so the estimate never undershoots the painted area.
+        """
+        radius = pm.artAttrPaintVertexCtx(PAINT_CTX, q=1, radius=1)
+        # NOTES(timmyliang): the projection carries the film fit and overscan
+        matrix = OpenMaya.MMatrix()
+        view.projectionMatrix(matrix)
+        radius *= matrix(1, 1) * view.portHeight() / 2
+        camera_path = OpenMaya.MDagPath()
+        view.getCamera(camera_path)
+        camera = OpenMaya.MFnCamera(camera_path)
+        if camera.isOrtho():
+            return radius
+
+        eye = camera.eyePoint(OpenMaya.MSpace.kWorld)
+        distance = float("inf")
+        for node in cls.get_paint_nodes():
+            dag_path = node.__apimdagpath__()
+            bbox = OpenMaya.MFnDagNode(dag_path).boundingBox()
+            bbox.transformUsing(dag_path.inclusiveMatrix())
+            low, high = bbox.min(), bbox.max()
+            offsets = [
+                max(low[axis] - eye[axis], 0, eye[axis] - high[axis])
+                for axis in range(3)
+            ]
+            distance = min(distance, math.sqrt(sum(offset ** 2 for offset in offsets)))
+        return radius / max(distance, camera.nearClippingPlane())
+
+    @classmethod
+    def add_step(cls, color_deltas):
+        """Add ``color_deltas`` to the paint history and prune it to the budget.
+
+        Returns:
+            int: the new step, only kept in the history when it has deltas.
+        """
+        # NOTE(timmyliang): undone steps can not be redone after a new step
+        for step in cls.undone_steps:
+            cls.vertex_color_data.pop(step, None)
+        cls.undone_steps.clear()
+
+        cls.step_count += 1
+        step = cls.step_count
+        # NOTES(timmyliang): nothing to undo, do not keep an empty step
+        if color_deltas:
+            cls.vertex_color_data[step] = color_deltas
+        cls.prune_history(step=step)
+        return step
+
+    @classmethod
+    def history_bytes(cls):
+        """Return the bytes held by the paint history of each mesh."""
+        mesh_bytes = defaultdict(int)
+        for color_deltas in cls.vertex_color_data.values():
+            for path, delta in color_deltas.items():
+                mesh_bytes[path] += vertex_color_engine.delta_nbytes(delta)
+        return mesh_bytes
+
+    @staticmethod
+    def step_bytes(color_deltas):
+        deltas = color_deltas.values()
+        return sum(vertex_color_engine.delta_nbytes(delta) for delta in deltas)
+
+    @classmethod
+    def prune_history(cls, budget=None, step=None):
+        """Evict the oldest steps until the history fits the budget in MB.
+
+        A new ``step`` exceeding the budget on its own is the only one evicted.
+        """
+        if budget is None:
+            budget = get_option_var(HISTORY_BUDGET_OPTION, HISTORY_BUDGET_DEFAULT)
+        budget_bytes = budget * 1024 * 1024
+        color_deltas = cls.vertex_color_data.get(step)
+        if color_deltas and cls.step_bytes(color_deltas) > budget_bytes:
+            del cls.vertex_color_data[step]
+            color_deltas.clear()
+            cls.eviction_count += 1
+            return
+
+        total_bytes = sum(cls.history_bytes().values())
+        while cls.vertex_color_data and total_bytes > budget_bytes:
+            step, color_deltas = cls.vertex_color_data.popitem(last=False)
+            total_bytes -= cls.step_bytes(color_deltas)
+            color_deltas.clear()
+            cls.evicted_step = step
+            cls.eviction_count += 1
 
     def isUndoable(self):
-        return True
+        return self.undoable
+
+
+class VertexColorPainterHistory(VertexColorCommandBase):
+    """Query the paint history kept for undo.
+
+    Return mesh path and byte count pairs by default.
+    ``-budget`` returns the budget in MB, ``-evictions`` the number of pruned
+    steps and ``-clear`` prunes the whole history.
+    """
+
+    syntax_flags = (
+        ("-b", "-budget"),
+        ("-ev", "-evictions"),
+        ("-cl", "-clear"),
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        if arg_data.isFlagSet("-budget"):
+            budget = get_option_var(HISTORY_BUDGET_OPTION, HISTORY_BUDGET_DEFAULT)
+            self.setResult(budget)
+        elif arg_data.isFlagSet("-evictions"):
+            self.setResult(ApplyVertexColorCommand.eviction_count)
+        elif arg_data.isFlagSet("-clear"):
+            ApplyVertexColorCommand.prune_history(budget=0)
+        else:
+            history_bytes = ApplyVertexColorCommand.history_bytes()
+            for path, mesh_bytes in sorted(history_bytes.items()):
+                self.appendToResult(path)
+                self.appendToResult(str(mesh_bytes))
+
+
+class VertexColorPainterStats(VertexColorCommandBase):
+    """Query the latency of each paint stroke phase.
+
+    Return phase, sample count, p50, p95 and max in milliseconds for every
+    phase by default. ``-counters`` returns the vertices, bytes written,
+    strokes and skipped moves counted so far and ``-reset`` clears all of them.
+    """
+
+    syntax_flags = (
+        ("-c", "-counters"),
+        ("-r", "-reset"),
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        if arg_data.isFlagSet("-reset"):
+            PROFILER.reset()
+        elif arg_data.isFlagSet("-counters"):
+            for name, value in sorted(PROFILER.counters.items()):
+                self.appendToResult(name)
+                self.appendToResult(str(value))
+        else:
+            for phase, (count, p50, p95, peak) in PROFILER.stats().items():
+                self.appendToResult(phase)
+                self.appendToResult(str(count))
+                for seconds in (p50, p95, peak):
+                    self.appendToResult("{0:.3f}".format(seconds * 1000))
+
+
+class ColorDeltaCommandBase(ApplyVertexColorBase, VertexColorCommandBase):
+    """Undoable command writing the main color set through ``ColorDelta``.
+
+    Each call is a step of the paint history shared with the strokes, so it
+    counts towards the history budget.
+    """
+
+    def __init__(self):
+        super(ColorDeltaCommandBase, self).__init__()
+        self.step = None
+        self.color_deltas = {}
+        self.undoable = False
+
+    def record_colors(self, path, vertex_ids, before, after):
+        """Keep the vertices changed between ``before`` and ``after``."""
+        delta = vertex_color_engine.diff_colors(vertex_ids, before, after)
+        if len(delta.vertex_ids):
+            self.color_deltas[path] = delta
+
+    def record_step(self):
+        """Apply the recorded deltas and add them to the paint history."""
+        self.redoIt()
+        is_empty = not self.color_deltas
+        self.step = ApplyVertexColorCommand.add_step(self.color_deltas)
+        history = ApplyVertexColorCommand.vertex_color_data
+        self.undoable = not is_empty and self.step in history
+
+    def undoIt(self):
+        ApplyVertexColorCommand.undone_steps.add(self.step)
+        if self.step <= ApplyVertexColorCommand.evicted_step:
+            pm.displayWarning("Paint history of this step was pruned by budget")
+            return
+        for path, delta in self.color_deltas.items():
+            self.apply_color_delta(path, delta.vertex_ids, delta.before)
+
+    def redoIt(self):
+        ApplyVertexColorCommand.undone_steps.discard(self.step)
+        for path, delta in self.color_deltas.items():
+            self.apply_color_delta(path, delta.vertex_ids, delta.after)
+
+    def isUndoable(self):
+        return self.undoable
+
+
+class VertexColorChannelOp(ColorDeltaCommandBase):
+    """Run channel operations on the main color set of the selected meshes.
+
+    ``-copy R A`` copies a channel into another, ``-swap R A`` exchanges two
+    channels, ``-invert G`` inverts a channel, ``-fill B 0.5`` sets a constant
+    and ``-remap R 0 1 0.2 0.8`` remaps a range. Flags combined in one call run
+    in this order. The ``VertexColor{X}`` sets are kept in sync. Vertices
+    without color are treated as opaque black.
+    """
+
+    syntax_flags = (
+        ("-cp", "-copy", OpenMaya.MSyntax.kString, OpenMaya.MSyntax.kString),
+        ("-sw", "-swap", OpenMaya.MSyntax.kString, OpenMaya.MSyntax.kString),
+        ("-inv", "-invert", OpenMaya.MSyntax.kString),
+        ("-f", "-fill", OpenMaya.MSyntax.kString, OpenMaya.MSyntax.kDouble),
+        ("-rm", "-remap", OpenMaya.MSyntax.kString) + (OpenMaya.MSyntax.kDouble,) * 4,
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        operations = self.get_operations(arg_data)
+        if not operations:
+            pm.displayWarning("No channel operation flag given")
+            return
+        for node in pm.ls(sl=1, dag=1, type="mesh", noIntermediate=1):
+            main_color_set = self.get_main_color_set(node)
+            if not main_color_set:
+                continue
+            main_colors = self.read_color_buffer(node.__apimfn__(), main_color_set)
+            colors = vertex_color_engine.fill_unset_colors(main_colors)
+            for operation in operations:
+                colors = operation(colors)
+            vtx_ids = numpy.arange(len(colors), dtype=numpy.int32)
+            self.record_colors(node.fullPathName(), vtx_ids, main_colors, colors)
+        self.record_step()
+
+    @classmethod
+    def get_operations(cls, arg_data):
+        """Return the buffer operations of the flags set, in flag order."""
+        operations = []
+        if arg_data.isFlagSet("-copy"):
+            source = cls.get_channel(arg_data, "-copy")
+            target = cls.get_channel(arg_data, "-copy", 1)
+            operations.append(
+                partial(vertex_color_engine.copy_channel, source=source, target=target)
+            )
+        if arg_data.isFlagSet("-swap"):
+            first = cls.get_channel(arg_data, "-swap")
+            second = cls.get_channel(arg_data, "-swap", 1)
+            operations.append(
+                partial(vertex_color_engine.swap_channels, first=first, second=second)
+            )
+        if arg_data.isFlagSet("-invert"):
+            index = cls.get_channel(arg_data, "-invert")
+            operations.append(partial(vertex_color_engine.invert_channel, index=index))
+        if arg_data.isFlagSet("-fill"):
+            index = cls.get_channel(arg_data, "-fill")
+            value = arg_data.flagArgumentDouble("-fill", 1)
+            operations.append(
+                partial(vertex_color_engine.fill_channel, index=index, value=value)
+            )
+        if arg_data.isFlagSet("-remap"):
+            index = cls.get_channel(arg_data, "-remap")
+            old_min, old_max, new_min, new_max = [
+                arg_data.flagArgumentDouble("-remap", i) for i in range(1, 5)
+            ]
+            operations.append(
+                partial(
+                    vertex_color_engine.remap_channel,
+                    index=index,
+                    old_min=old_min,
+                    old_max=old_max,
+                    new_min=new_min,
+                    new_max=new_max,
+                )
+            )
+        return operations
+
+
+class VertexColorChannelSmooth(ColorDeltaCommandBase):
+    """Smooth one channel of the main color set over the vertex neighbors.
+
+    ``-channel R`` picks the channel, ``-iterations`` and ``-strength`` how
+    much it is blurred. Selected meshes are smoothed as a whole, component
+    selections only on their vertices.
+    """
+
+    syntax_flags = (
+        ("-ch", "-channel", OpenMaya.MSyntax.kString),
+        ("-it", "-iterations", OpenMaya.MSyntax.kLong),
+        ("-st", "-strength", OpenMaya.MSyntax.kDouble),
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        if not arg_data.isFlagSet("-channel"):
+            raise RuntimeError("-channel flag is required")
+        channel_index = self.get_channel(arg_data, "-channel")
+        iterations = 1
+        if arg_data.isFlagSet("-iterations"):
+            iterations = arg_data.flagArgumentInt("-iterations", 0)
+        strength = 1.0
+        if arg_data.isFlagSet("-strength"):
+            strength = arg_data.flagArgumentDouble("-strength", 0)
+
+        for path, vtx_ids in self.get_selected_vertices().items():
+            node = PaintNodeRegistry.get_node(path)
+            main_color_set = self.get_main_color_set(node)
+            if not main_color_set:
+                continue
+            main_colors = self.read_color_buffer(node.__apimfn__(), main_color_set)
+            if vtx_ids is None:
+                vtx_ids = numpy.arange(len(main_colors), dtype=numpy.int32)
+            offsets, neighbors = AdjacencyCache.get_adjacency(node.__apimdagpath__())
+            with PROFILER.phase("smooth", mesh=path, vertices=len(vtx_ids)):
+                colors = vertex_color_engine.smooth_channel(
+                    vertex_color_engine.fill_unset_colors(main_colors),
+                    channel_index,
+                    offsets,
+                    neighbors,
+                    vtx_ids,
+                    iterations,
+                    strength,
+                )
+            self.record_colors(path, vtx_ids, main_colors[vtx_ids], colors[vtx_ids])
+        self.record_step()
+
+
+class VertexColorChannelFlood(ColorDeltaCommandBase):
+    """Set one channel of the selected vertices to a value in one undo step.
+
+    ``-channel R -value 0.5`` floods the vertices of a component selection,
+    or every vertex of the meshes selected as objects.
+    """
+
+    syntax_flags = (
+        ("-ch", "-channel", OpenMaya.MSyntax.kString),
+        ("-v", "-value", OpenMaya.MSyntax.kDouble),
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        if not arg_data.isFlagSet("-channel") or not arg_data.isFlagSet("-value"):
+            raise RuntimeError("-channel and -value flags are required")
+        channel_index = self.get_channel(arg_data, "-channel")
+        value = arg_data.flagArgumentDouble("-value", 0)
+
+        for path, vtx_ids in self.get_selected_vertices().items():
+            node = PaintNodeRegistry.get_node(path)
+            main_color_set = self.get_main_color_set(node)
+            if not main_color_set:
+                continue
+            main_colors = self.read_color_buffer(node.__apimfn__(), main_color_set)
+            if vtx_ids is None:
+                vtx_ids = numpy.arange(len(main_colors), dtype=numpy.int32)
+            before = main_colors[vtx_ids]
+            after = vertex_color_engine.fill_unset_colors(before)
+            after = vertex_color_engine.fill_channel(after, channel_index, value)
+            self.record_colors(path, vtx_ids, before, after)
+        self.record_step()
+
+
+class VertexColorExport(ApplyVertexColorBase, VertexColorCommandBase):
+    """Export the main color set of the selected meshes to ``.npy`` files.
+
+    ``-directory`` is the export folder, listed in its ``index.json``.
+    ``-channel R`` only exports that channel.
+    """
+
+    syntax_flags = (
+        ("-d", "-directory", OpenMaya.MSyntax.kString),
+        ("-ch", "-channel", OpenMaya.MSyntax.kString),
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        if not arg_data.isFlagSet("-directory"):
+            raise RuntimeError("-directory flag is required")
+        directory = arg_data.flagArgumentString("-directory", 0)
+        channel = None
+        if arg_data.isFlagSet("-channel"):
+            channel = CHANNELS[self.get_channel(arg_data, "-channel")]
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        index = vertex_color_io.read_index(directory)
+        for path in self.get_selected_vertices():
+            node = PaintNodeRegistry.get_node(path)
+            main_color_set = self.get_main_color_set(node)
+            if not main_color_set:
+                continue
+            main_colors = self.read_color_buffer(node.__apimfn__(), main_color_set)
+            topology_hash = AdjacencyCache.get_topology_hash(node.__apimdagpath__())
+            entry = vertex_color_io.export_npy(
+                directory, path, main_colors, topology_hash, channel
+            )
+            index[entry["file"]] = entry
+            self.appendToResult(os.path.join(directory, entry["file"]))
+        vertex_color_io.write_index(directory, index)
+
+
+class VertexColorImport(ColorDeltaCommandBase):
+    """Import the ``.npy`` files exported for the selected meshes.
+
+    ``-directory`` is the export folder. ``-channel R`` only imports that
+    channel, from a single channel file or from a full color file. Without
+    it the full color file wins over the channel files. Files whose vertex
+    count or topology hash no longer match are rejected, so are mesh names
+    matching several exported meshes. Component selections only import
+    their vertices.
+    """
+
+    syntax_flags = (
+        ("-d", "-directory", OpenMaya.MSyntax.kString),
+        ("-ch", "-channel", OpenMaya.MSyntax.kString),
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        if not arg_data.isFlagSet("-directory"):
+            raise RuntimeError("-directory flag is required")
+        directory = arg_data.flagArgumentString("-directory", 0)
+        channel = None
+        if arg_data.isFlagSet("-channel"):
+            channel = CHANNELS[self.get_channel(arg_data, "-channel")]
+        index = vertex_color_io.read_index(directory)
+
+        for path, vtx_ids in self.get_selected_vertices().items():
+            node = PaintNodeRegistry.get_node(path)
+            try:
+                entries = vertex_color_io.find_entries(index, path)
+            except ValueError as error:
+                pm.displayWarning("Skip {0}".format(error))
+                continue
+            entries = self.filter_entries(entries, channel)
+            entries = [entry for entry in entries if self.is_matched(node, entry)]
+            if not entries:
+                continue
+            main_color_set = self.get_main_color_set(node)
+            if not main_color_set:
+                continue
+            main_colors = self.read_color_buffer(node.__apimfn__(), main_color_set)
+            if vtx_ids is None:
+                vtx_ids = numpy.arange(len(main_colors), dtype=numpy.int32)
+            colors = vertex_color_engine.fill_unset_colors(main_colors[vtx_ids])
+            for entry in entries:
+                data = vertex_color_io.load_npy(directory, entry)
+                if entry["channel"]:
+                    colors[:, CHANNELS.index(entry["channel"])] = data[vtx_ids]
+                elif channel:
+                    channel_index = CHANNELS.index(channel)
+                    colors[:, channel_index] = data[vtx_ids, channel_index]
+                else:
+                    colors[:] = data[vtx_ids]
+            self.record_colors(path, vtx_ids, main_colors[vtx_ids], colors)
+        self.record_step()
+
+    @staticmethod
+    def filter_entries(entries, channel=None):
+        """Pick the entries to import.
+
+        Without ``channel`` the full color file wins over the channel files,
+        which are only imported when no full file was exported.
+        """
+        entries = sorted(entries, key=lambda entry: entry["channel"] or "")
+        full = [entry for entry in entries if not entry["channel"]]
+        if channel:
+            matched = [entry for entry in entries if entry["channel"] == channel]
+            return matched or full[:1]
+        return full[:1] or entries
+
+    @staticmethod
+    def is_matched(node, entry):
+        # NOTES(timmyliang): vertex count is free, only hash when it matches
+        dag_path = node.__apimdagpath__()
+        if OpenMaya.MFnMesh(dag_path).numVertices() != entry["vertex_count"]:
+            is_matched = False
+        else:
+            topology_hash = AdjacencyCache.get_topology_hash(dag_path)
+            is_matched = topology_hash == entry["topology_hash"]
+        if not is_matched:
+            pm.displayWarning(
+                "Skip {0}, {1} topology does not match".format(
+                    entry["file"], node.fullPathName()
+                )
+            )
+        return is_matched
+
+
+class VertexColorStreamExport(ApplyVertexColorBase, VertexColorCommandBase):
+    """Stream the main color set of every mesh in the scene to one file.
+
+    ``-file`` is the container path. ``-chunkSize`` is the number of vertices
+    converted and written at once. Meshes are read one at a time but each is
+    still copied out of Maya whole, so peak memory follows the largest mesh.
+    ``-half`` stores float16 colors. Return the number of meshes and vertices
+    written.
+    """
+
+    syntax_flags = (
+        ("-f", "-file", OpenMaya.MSyntax.kString),
+        ("-cs", "-chunkSize", OpenMaya.MSyntax.kLong),
+        ("-hf", "-half"),
+    )
+
+    def doIt(self, args):
+        arg_data = OpenMaya.MArgDatabase(self.syntax(), args)
+        if not arg_data.isFlagSet("-file"):
+            raise RuntimeError("-file flag is required")
+        file_path = arg_data.flagArgumentString("-file", 0)
+        chunk_size = STREAM_CHUNK_SIZE
+        if arg_data.isFlagSet("-chunkSize"):
+            chunk_size = max(arg_data.flagArgumentInt("-chunkSize", 0), 1)
+        dtype = numpy.float16 if arg_data.isFlagSet("-half") else numpy.float32
+
+        mesh_count = vertex_count = 0
+        with vertex_color_io.ContainerWriter(file_path, dtype) as writer:
+            for node in pm.ls(type="mesh", noIntermediate=1):
+                mesh = node.__apimfn__()
+                # NOTES(timmyliang): query only, meshes without colors are skipped
+                color_sets = []
+                mesh.getColorSetNames(color_sets)
+                if not color_sets:
+                    continue
+                path = node.fullPathName()
+                with PROFILER.phase("stream_export", mesh=path):
+                    chunks = self.iter_color_chunks(mesh, color_sets[0], chunk_size)
+                    entry = writer.add_mesh(path, color_sets[0], chunks)
+                mesh_count += 1
+                vertex_count += entry["vertex_count"]
+        self.appendToResult(mesh_count)
+        self.appendToResult(vertex_count)
+
+
+PLUGIN_COMMANDS = [
+    ApplyVertexColorCommand,
+    VertexColorPainterHistory,
+    VertexColorPainterStats,
+    VertexColorChannelOp,
+    VertexColorChannelSmooth,
+    VertexColorChannelFlood,
+    VertexColorExport,
+    VertexColorImport,
+    VertexColorStreamExport,
+]
 
 
 def mel_proc(func):
@@ -447,6 +1771,9 @@ def mel_proc(func):
 
 @mel_proc
 def vertex_color_tool_on():
+    # NOTE(timmyliang): opt-in trace of the whole tool session
+    if get_option_var(TRACE_PATH_OPTION, ""):
+        PROFILER.start_trace()
     AppVertexColorFilter.install()
     if not pm.artAttrPaintVertexCtx(PAINT_CTX, q=1, pna=1):
         pm.headsUpMessage("Please Select Mesh")
@@ -455,6 +1782,9 @@ def vertex_color_tool_on():
 @mel_proc
 def vertex_color_tool_off():
     AppVertexColorFilter.uninstall()
+    trace_path = get_option_var(TRACE_PATH_OPTION, "")
+    if trace_path:
+        PROFILER.stop_trace(trace_path)
 
 
 @contextmanager
@@ -469,8 +1799,9 @@ def try_run(name):
 # Initialize the script plug-in
 def initializePlugin(obj):
     plugin_fn = OpenMayaMPx.MFnPlugin(obj, "timmyliang", "1.0.0")
-    with try_run(ApplyVertexColorCommand.command_name()) as name:
-        plugin_fn.registerCommand(name, ApplyVertexColorCommand.creator)
+    for command in PLUGIN_COMMANDS:
+        with try_run(command.command_name()) as name:
+            plugin_fn.registerCommand(name, command.creator, command.syntax_creator)
 
     PAINT_CTX = pm.mel.artAttrColorPerVertexToolScript(5)
     # NOTES(timmyliang): close Tool Settings UI
@@ -483,7 +1814,9 @@ def initializePlugin(obj):
 # Uninitialize the script plug-in
 def uninitializePlugin(obj):
     plugin_fn = OpenMayaMPx.MFnPlugin(obj)
-    with try_run(ApplyVertexColorCommand.command_name()) as name:
-        plugin_fn.deregisterCommand(name)
+    for command in PLUGIN_COMMANDS:
+        with try_run(command.command_name()) as name:
+            plugin_fn.deregisterCommand(name)
+    AdjacencyCache.clear()
     pm.artAttrPaintVertexCtx(PAINT_CTX, e=1, top="")
     pm.artAttrPaintVertexCtx(PAINT_CTX, e=1, tfp="")
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized color buffer operations for the vertex color painter plugin.
+
+Every buffer is a contiguous ``(N, 4)`` float32 array holding one RGBA
+color per vertex, the same layout ``MColorArray.get`` fills.
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+from collections import namedtuple
+import ctypes
+import zlib
+
+# Import third-party modules
+import numpy
+
+
+CHANNEL_COUNT = 4
+BLANK_COLOR = (0.0, 0.0, 0.0, 1.0)
+UNSET_COLOR = (-1.0, -1.0, -1.0, -1.0)
+
+ColorDelta = namedtuple("ColorDelta", ["vertex_ids", "before", "after"])
+
+
+def buffer_from_address(address, count, columns=CHANNEL_COUNT, ctype=ctypes.c_float):
+    """Copy ``count`` rows of ``ctype`` starting at a raw memory address."""
+    size = count * columns
+    if not size:
+        return numpy.zeros((count, columns), dtype=ctype)
+    data = (ctype * size).from_address(address)
+    return numpy.ctypeslib.as_array(data).reshape(count, columns).copy()
+
+
+def blank_colors(count):
+    """Return ``count`` colors initialized like ``filter_color`` does."""
+    colors = numpy.empty((count, CHANNEL_COUNT), dtype=numpy.float32)
+    colors[:] = BLANK_COLOR
+    return colors
+
+
+def fill_unset_colors(colors):
+    """Return ``colors`` with the vertices without color set to ``BLANK_COLOR``.
+
+    ``MFnMesh.getVertexColors`` returns ``UNSET_COLOR`` for them.
+    """
+    unset = numpy.all(colors == UNSET_COLOR, axis=1)
+    if not unset.any():
+        return colors
+    result = colors.copy()
+    result[unset] = BLANK_COLOR
+    return result
+
+
+def extract_channel(colors, index, slot=None):
+    """Isolate one channel of ``colors`` into a fresh buffer.
+
+    Vectorized counterpart of ``ApplyVertexColorBase.filter_color``
+    called without ``base_color``. ``slot`` is the column receiving the
+    channel, ``index`` by default.
+    """
+    slot = index if slot is None else slot
+    channel_colors = blank_colors(len(colors))
+    channel_colors[:, slot] = colors[:, index]
+    return channel_colors
+
+
+def merge_channel(main_colors, channel_colors, vertex_ids, index, slot=None):
+    """Merge one painted channel back into the main color buffer.
+
+    ``slot`` is the column of ``channel_colors`` holding the channel,
+    ``index`` by default.
+
+    Returns:
+        tuple: ``(final_colors, fix_colors)`` for ``vertex_ids``, the merged
+            main colors and the normalized single channel colors.
+    """
+    slot = index if slot is None else slot
+    painted_colors = channel_colors[vertex_ids]
+    final_colors = main_colors[vertex_ids]
+    final_colors[:, index] = painted_colors[:, slot]
+    return final_colors, extract_channel(painted_colors, slot)
+
+
+def diff_colors(vertex_ids, before, after):
+    """Keep only the vertices whose color changed between two buffers.
+
+    ``before`` and ``after`` are aligned with ``vertex_ids``.
+    """
+    changed = numpy.any(before != after, axis=1)
+    return ColorDelta(vertex_ids[changed], before[changed], after[changed])
+
+
+def delta_nbytes(delta):
+    """Return the memory held by a ``ColorDelta``."""
+    return sum(array.nbytes for array in delta)
+
+
+def color_hash(colors):
+    """Return a cheap content hash of a color buffer."""
+    checksum = zlib.adler32(numpy.ascontiguousarray(colors)) & 0xFFFFFFFF
+    return "{0}:{1:08x}".format(len(colors), checksum)
+
+
+def project_points(points, matrix, width, height):
+    """Project object space points to viewport pixels.
+
+    Args:
+        points (numpy.ndarray): ``(N, 3)`` object space positions.
+        matrix (numpy.ndarray): ``4x4`` object to clip space matrix in Maya
+            row vector convention.
+        width (int): viewport width in pixels.
+        height (int): viewport height in pixels.
+
+    Returns:
+        tuple: ``(screen, depth, inside)``, pixel positions from the bottom
+            left corner, window depth in ``[0, 1]`` and the in-frustum mask.
+    """
+    clip = numpy.dot(points, matrix[:3]) + matrix[3]
+    in_front = clip[:, 3] > 0
+    clip_w = numpy.where(in_front, clip[:, 3], 1.0)[:, None]
+    ndc = clip[:, :3] / clip_w
+    inside = in_front & numpy.all(numpy.abs(ndc) <= 1, axis=1)
+    screen = (ndc[:, :2] + 1) * 0.5 * (width, height)
+    depth = (ndc[:, 2] + 1) * 0.5
+    return screen, depth, inside
+
+
+def depth_test(screen, depth, depth_map, tolerance):
+    """Return the mask of points not hidden behind the depth map surface."""
+    height, width = depth_map.shape
+    pixel_x = numpy.clip(screen[:, 0].astype(numpy.int32), 0, width - 1)
+    pixel_y = numpy.clip(screen[:, 1].astype(numpy.int32), 0, height - 1)
+    return depth <= depth_map[pixel_y, pixel_x] + tolerance
+
+
+def points_in_radius(points, center, radius):
+    """Return the mask of 2D ``points`` within ``radius`` of ``center``."""
+    offsets = points - center
+    return numpy.einsum("ij,ij->i", offsets, offsets) <= radius * radius
+
+
+def copy_channel(colors, source, target):
+    """Return ``colors`` with channel ``source`` copied into ``target``."""
+    result = colors.copy()
+    result[:, target] = colors[:, source]
+    return result
+
+
+def swap_channels(colors, first, second):
+    result = colors.copy()
+    result[:, [first, second]] = colors[:, [second, first]]
+    return result
+
+
+def invert_channel(colors, index):
+    result = colors.copy()
+    result[:, index] = 1 - colors[:, index]
+    return result
+
+
+def fill_channel(colors, index, value):
+    result = colors.copy()
+    result[:, index] = value
+    return result
+
+
+def remap_channel(colors, index, old_min, old_max, new_min, new_max):
+    """Linearly remap a channel from ``[old_min, old_max]`` to ``[new_min, new_max]``.
+
+    Values outside of the old range are clamped, an empty old range acts as
+    a threshold.
+    """
+    result = colors.copy()
+    values = colors[:, index]
+    if old_max == old_min:
+        weight = (values >= old_max).astype(numpy.float32)
+    else:
+        weight = numpy.clip((values - old_min) / (old_max - old_min), 0, 1)
+    result[:, index] = new_min + weight * (new_max - new_min)
+    return result
+
+
+def build_adjacency(counts, connects, vertex_count):
+    """Build the CSR vertex adjacency of a polygon mesh.
+
+    Args:
+        counts (numpy.ndarray): vertex count of each face.
+        connects (numpy.ndarray): face vertex ids, face after face.
+        vertex_count (int): number of vertices of the mesh.
+
+    Returns:
+        tuple: ``(offsets, neighbors)``, the neighbors of vertex ``i`` are
+            ``neighbors[offsets[i]:offsets[i + 1]]``.
+    """
+    counts = numpy.asarray(counts, dtype=numpy.int64)
+    connects = numpy.asarray(connects, dtype=numpy.int64)
+    face_counts = numpy.repeat(counts, counts)
+    face_starts = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    corners = numpy.arange(len(connects)) - face_starts
+    following = connects[face_starts + (corners + 1) % face_counts]
+    # NOTES(timmyliang): every face edge links both ways, shared edges only once
+    sources = numpy.concatenate([connects, following])
+    targets = numpy.concatenate([following, connects])
+    keys = numpy.sort(sources * vertex_count + targets)
+    keys = keys[numpy.append(True, keys[1:] != keys[:-1])]
+    sources, targets = numpy.divmod(keys, vertex_count)
+    offsets = numpy.zeros(vertex_count + 1, dtype=numpy.int64)
+    numpy.cumsum(numpy.bincount(sources, minlength=vertex_count), out=offsets[1:])
+    return offsets, targets.astype(numpy.int32)
+
+
+def gather_neighbors(offsets, neighbors, vertex_ids):
+    """Return the neighbors of ``vertex_ids`` from a CSR adjacency.
+
+    Returns:
+        tuple: ``(ring, lengths)``, the neighbors of every vertex one after
+            another and the neighbor count of each vertex.
+    """
+    starts = offsets[vertex_ids]
+    lengths = offsets[vertex_ids + 1] - starts
+    heads = numpy.repeat(starts - (numpy.cumsum(lengths) - lengths), lengths)
+    return neighbors[heads + numpy.arange(lengths.sum())], lengths
+
+
+def grow_vertices(offsets, neighbors, vertex_ids, rings=1):
+    """Grow ``vertex_ids`` by ``rings`` rings of neighbors."""
+    vertex_ids = numpy.asarray(vertex_ids, dtype=numpy.int32)
+    for _ in range(rings):
+        ring, _ = gather_neighbors(offsets, neighbors, vertex_ids)
+        vertex_ids = numpy.union1d(vertex_ids, ring).astype(numpy.int32)
+    return vertex_ids
+
+
+def topology_hash(counts, connects):
+    """Return a content hash of the face vertex layout of a mesh."""
+    counts = numpy.ascontiguousarray(counts, dtype=numpy.int32)
+    connects = numpy.ascontiguousarray(connects, dtype=numpy.int32)
+    checksum = zlib.adler32(connects, zlib.adler32(counts))
+    return "{0}:{1}:{2:08x}".format(len(counts), len(connects), checksum & 0xFFFFFFFF)
+
+
+def smooth_channel(
+    colors, index, offsets, neighbors, vertex_ids=None, iterations=1, strength=1.0
+):
+    """Average one channel over the vertex neighbors.
+
+    Only ``vertex_ids`` are updated, all vertices by default. Each iteration
+    is a sparse adjacency matrix-vector product done with ``bincount``.
+
+    Returns:
+        numpy.ndarray: a copy of ``colors`` with the channel smoothed.
+    """
+    result = colors.copy()
+    if vertex_ids is None:
+        vertex_ids = numpy.arange(len(colors), dtype=numpy.int32)
+    ring, lengths = gather_neighbors(offsets, neighbors, vertex_ids)
+    rows = numpy.repeat(numpy.arange(len(vertex_ids)), lengths)
+    has_neighbors = lengths > 0
+    divisor = numpy.maximum(lengths, 1)
+
+    values = result[:, index].astype(numpy.float64)
+    for _ in range(iterations):
+        sums = numpy.bincount(rows, weights=values[ring], minlength=len(vertex_ids))
+        current = values[vertex_ids]
+        average = numpy.where(has_neighbors, sums / divisor, current)
+        values[vertex_ids] = current + (average - current) * strength
+    result[:, index] = values
+    return result
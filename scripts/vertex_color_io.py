@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Exchange vertex color buffers with files outside of Maya.
+
+Buffers are plain ``.npy`` files, so they can be memory-mapped, listed in
+an ``index.json`` with the vertex count and topology hash of their mesh.
+
+Whole scenes are streamed into a single container instead::
+
+    header   magic, version, index offset and index size
+    colors   the RGBA rows of each mesh, written chunk after chunk
+    index    JSON list of the meshes with their offset and vertex count
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+import hashlib
+import json
+import os
+import re
+import struct
+
+# Import third-party modules
+import numpy
+
+
+INDEX_NAME = "index.json"
+CONTAINER_MAGIC = b"VCPC"
+CONTAINER_VERSION = 1
+CONTAINER_HEADER = struct.Struct("<4sIQQ")
+
+
+def get_file_name(mesh_path, channel=None):
+    """Turn a mesh DAG path into a file name, ``|`` and ``:`` are not allowed.
+
+    A short hash of the path keeps paths only differing by those apart.
+    """
+    name = re.sub(r"[|:]+", "_", mesh_path).strip("_")
+    path_hash = hashlib.md5(mesh_path.encode("utf-8")).hexdigest()[:8]
+    name = "{0}.{1}".format(name, path_hash)
+    return "{0}.{1}.npy".format(name, channel) if channel else name + ".npy"
+
+
+def read_index(directory):
+    index_path = os.path.join(directory, INDEX_NAME)
+    if not os.path.isfile(index_path):
+        return {}
+    with open(index_path) as handle:
+        return json.load(handle)
+
+
+def write_index(directory, index):
+    with open(os.path.join(directory, INDEX_NAME), "w") as handle:
+        json.dump(index, handle, indent=2, sort_keys=True)
+
+
+def export_npy(directory, mesh_path, colors, topology_hash, channel=None):
+    """Save a color buffer or one of its channels and return its index entry.
+
+    Args:
+        directory (str): export folder.
+        mesh_path (str): DAG path of the mesh.
+        colors (numpy.ndarray): ``(N, 4)`` main color buffer.
+        topology_hash (str): hash of the face vertex layout of the mesh.
+        channel (str): only save this channel of ``colors`` as ``(N,)``.
+
+    Returns:
+        dict: the entry of the mesh in ``index.json``.
+    """
+    if channel:
+        colors = colors[:, "RGBA".index(channel)]
+    file_name = get_file_name(mesh_path, channel)
+    numpy.save(os.path.join(directory, file_name), numpy.ascontiguousarray(colors))
+    return {
+        "mesh": mesh_path,
+        "file": file_name,
+        "channel": channel,
+        "vertex_count": len(colors),
+        "topology_hash": topology_hash,
+    }
+
+
+def find_entries(index, mesh_path):
+    """Return the index entries exported from ``mesh_path``.
+
+    Fall back to the mesh name so data survives a change of hierarchy.
+
+    Raises:
+        ValueError: the mesh name matches entries of several meshes.
+    """
+    entries = [entry for entry in index.values() if entry["mesh"] == mesh_path]
+    if entries:
+        return entries
+    name = mesh_path.split("|")[-1]
+    entries = [
+        entry for entry in index.values() if entry["mesh"].split("|")[-1] == name
+    ]
+    meshes = sorted(set(entry["mesh"] for entry in entries))
+    if len(meshes) > 1:
+        raise ValueError(
+            "{0} matches several meshes: {1}".format(mesh_path, ", ".join(meshes))
+        )
+    return entries
+
+
+def load_npy(directory, entry):
+    """Memory-map the buffer of an index entry."""
+    return numpy.load(os.path.join(directory, entry["file"]), mmap_mode="r")
+
+
+class ContainerWriter(object):
+    """Stream the color buffers of many meshes into one container file.
+
+    Only the chunk being written is held in memory.
+    """
+
+    def __init__(self, path, dtype=numpy.float32):
+        self.dtype = numpy.dtype(dtype)
+        self.entries = []
+        self.handle = open(path, "wb")
+        header = CONTAINER_HEADER.pack(CONTAINER_MAGIC, CONTAINER_VERSION, 0, 0)
+        self.handle.write(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_mesh(self, mesh_path, color_set, chunks):
+        """Write the ``(N, 4)`` color ``chunks`` of a mesh one after another."""
+        offset = self.handle.tell()
+        vertex_count = 0
+        for chunk in chunks:
+            chunk = numpy.ascontiguousarray(chunk, dtype=self.dtype)
+            self.handle.write(chunk.tobytes())
+            vertex_count += len(chunk)
+        entry = {
+            "mesh": mesh_path,
+            "color_set": color_set,
+            "offset": offset,
+            "vertex_count": vertex_count,
+        }
+        self.entries.append(entry)
+        return entry
+
+    def close(self):
+        if self.handle.closed:
+            return
+        index = {"dtype": self.dtype.str, "meshes": self.entries}
+        index_data = json.dumps(index).encode("utf-8")
+        index_offset = self.handle.tell()
+        self.handle.write(index_data)
+        self.handle.seek(0)
+        self.handle.write(
+            CONTAINER_HEADER.pack(
+                CONTAINER_MAGIC, CONTAINER_VERSION, index_offset, len(index_data)
+            )
+        )
+        self.handle.close()
+
+
+def read_container_index(path):
+    """Return the index of a container written by ``ContainerWriter``."""
+    with open(path, "rb") as handle:
+        magic, version, index_offset, index_size = CONTAINER_HEADER.unpack(
+            handle.read(CONTAINER_HEADER.size)
+        )
+        if magic != CONTAINER_MAGIC or version > CONTAINER_VERSION:
+            raise ValueError("Not a vertex color container: {0}".format(path))
+        handle.seek(index_offset)
+        return json.loads(handle.read(index_size).decode("utf-8"))
+
+
+def load_container_mesh(path, index, entry):
+    """Memory-map the colors of one mesh entry of a container."""
+    return numpy.memmap(
+        path,
+        dtype=numpy.dtype(index["dtype"]),
+        mode="r",
+        offset=entry["offset"],
+        shape=(entry["vertex_count"], 4),
+    )
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Rolling latency statistics for the phases of a paint stroke.
+
+Each phase keeps its last ``window`` durations in seconds, counters are
+plain totals since the last reset. Phases are also recorded as Chrome trace
+events while a trace is started, see ``chrome://tracing`` or Perfetto.
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+from collections import OrderedDict
+from collections import defaultdict
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from timeit import default_timer
+import json
+import os
+import threading
+
+# Import third-party modules
+import numpy
+
+
+WINDOW = 512
+
+
+class StrokeProfiler(object):
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.samples = OrderedDict()
+        self.counters = defaultdict(int)
+        self.trace_events = None
+
+    @contextmanager
+    def phase(self, name, **args):
+        """Time the block as ``name``, ``args`` end up in the trace begin event."""
+        self.trace(name, "B", args)
+        start = default_timer()
+        try:
+            yield
+        finally:
+            self.record(name, default_timer() - start)
+            self.trace(name, "E")
+
+    def timed(self, name):
+        """Decorate a function to record its duration under ``name``."""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def record(self, name, seconds):
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+        self.samples[name].append(seconds)
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def stats(self):
+        """Return ``{phase: (count, p50, p95, max)}`` with durations in seconds."""
+        stats = OrderedDict()
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            p50, p95 = numpy.percentile(samples, [50, 95])
+            stats[name] = (len(samples), float(p50), float(p95), max(samples))
+        return stats
+
+    def instant(self, name, **args):
+        self.trace(name, "i", args)
+
+    def trace(self, name, phase, args=None):
+        if self.trace_events is None:
+            return
+        event = {
+            "name": name,
+            "ph": phase,
+            "ts": default_timer() * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.current_thread().ident,
+        }
+        if phase == "i":
+            event["s"] = "t"
+        if args:
+            event["args"] = args
+        self.trace_events.append(event)
+
+    def start_trace(self):
+        self.trace_events = []
+
+    def stop_trace(self, path):
+        """Write the recorded events to ``path`` as Chrome trace JSON."""
+        trace_events, self.trace_events = self.trace_events, None
+        if trace_events is None:
+            return
+        with open(path, "w") as handle:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, handle)
+
+    def reset(self):
+        self.samples.clear()
+        self.counters.clear()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Run the plugin headless against ``benchmarks/maya_standin.py``.
+"""
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import built-in modules
+import os
+import sys
+
+# Import third-party modules
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+# Import local modules
+import bench_paint_pipeline  # noqa: E402
+import maya_standin  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def plugin():
+    return bench_paint_pipeline.load_plugin()
+
+
+@pytest.fixture
+def mesh_path(plugin):
+    """A selected 10x10 grid mesh with random colors, painted in RGB mode."""
+    path = bench_paint_pipeline.setup_scene(plugin, 100, "RGB")
+    maya_standin.State.selection = [path]
+    yield path
+    plugin.AdjacencyCache.clear()
+    plugin.PaintNodeRegistry.clear()
+
+
+@pytest.fixture
+def mesh(mesh_path):
+    return maya_standin.SCENE[mesh_path]
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import third-party modules
+import numpy
+import pytest
+
+# Import local modules
+import bench_paint_pipeline
+import maya_standin
+import vertex_color_engine
+import vertex_color_io
+
+
+def get_main_colors(mesh):
+    return mesh.color_sets["colorSet1"]
+
+
+def run(command, **flags):
+    """Run ``command`` with ``flags`` given by their long name."""
+    args = {"-" + flag: list(value) for flag, value in flags.items()}
+    command.doIt(args)
+    return command
+
+
+def test_stroke_undo_redo(plugin, mesh_path, mesh):
+    before = get_main_colors(mesh).copy()
+    bench_paint_pipeline.paint_stroke(plugin, mesh_path, "RGB", 0.2, 0)
+    after = get_main_colors(mesh).copy()
+    command = run(plugin.ApplyVertexColorCommand())
+    assert command.isUndoable()
+
+    command.undoIt()
+    numpy.testing.assert_array_equal(get_main_colors(mesh), before)
+    command.redoIt()
+    numpy.testing.assert_array_equal(get_main_colors(mesh), after)
+
+
+def test_stroke_merges_painted_channel(plugin, mesh_path):
+    bench_paint_pipeline.setup_scene(plugin, 100, "G")
+    mesh = maya_standin.SCENE[mesh_path]
+    plugin.AppVertexColorFilter.setup_color_set()
+    before = get_main_colors(mesh).copy()
+    bench_paint_pipeline.paint_stroke(plugin, mesh_path, "G", 0.2, 0)
+    vtx_ids = plugin.ApplyVertexColorCommand.vertex_ids_data[mesh_path]
+    command = run(plugin.ApplyVertexColorCommand())
+
+    main_colors = get_main_colors(mesh)
+    numpy.testing.assert_array_equal(main_colors[vtx_ids, 1], 0.5)
+    numpy.testing.assert_array_equal(main_colors[:, [0, 2, 3]], before[:, [0, 2, 3]])
+    command.undoIt()
+    numpy.testing.assert_array_equal(get_main_colors(mesh), before)
+    channel_colors = mesh.color_sets["VertexColorG"]
+    numpy.testing.assert_array_equal(channel_colors[:, 1], before[:, 1])
+
+
+def test_oversized_stroke_keeps_history(plugin, mesh_path):
+    command_class = plugin.ApplyVertexColorCommand
+    commands = []
+    for seed in range(3):
+        bench_paint_pipeline.paint_stroke(plugin, mesh_path, "RGB", 0.1, seed)
+        commands.append(run(command_class()))
+    steps = list(command_class.vertex_color_data)
+    # NOTES(timmyliang): the last stroke alone is larger than the budget
+    budget = sum(command_class.history_bytes().values()) / 1024.0 / 1024.0 * 1.5
+    maya_standin.OPTION_VARS[plugin.HISTORY_BUDGET_OPTION] = budget
+    bench_paint_pipeline.paint_stroke(plugin, mesh_path, "RGB", 0.9, 3)
+    command = run(command_class())
+
+    assert not command.isUndoable()
+    assert list(command_class.vertex_color_data) == steps
+    assert command_class.eviction_count == 1
+    assert all(command.isUndoable() for command in commands)
+
+
+def test_channel_op_joins_history(plugin, mesh_path, mesh):
+    command_class = plugin.ApplyVertexColorCommand
+    bench_paint_pipeline.paint_stroke(plugin, mesh_path, "RGB", 0.1, 0)
+    stroke = run(command_class())
+    command = run(plugin.VertexColorChannelOp(), invert=["R"])
+    assert list(command_class.vertex_color_data) == [stroke.step, command.step]
+    assert command.isUndoable()
+
+    # NOTES(timmyliang): the inverted mesh alone is larger than the budget
+    budget = command_class.step_bytes(command.color_deltas) / 1024.0 / 1024.0 / 2
+    maya_standin.OPTION_VARS[plugin.HISTORY_BUDGET_OPTION] = budget
+    before = get_main_colors(mesh).copy()
+    command = run(plugin.VertexColorChannelOp(), invert=["G"])
+    numpy.testing.assert_allclose(get_main_colors(mesh)[:, 1], 1 - before[:, 1])
+    assert not command.isUndoable()
+    assert len(command_class.vertex_color_data) == 2
+    assert command_class.eviction_count == 1
+
+
+def test_channel_op_fills_unset_colors(plugin, mesh_path, mesh):
+    get_main_colors(mesh)[:10] = vertex_color_engine.UNSET_COLOR
+    before = get_main_colors(mesh).copy()
+    command = run(plugin.VertexColorChannelOp(), invert=["R"])
+
+    main_colors = get_main_colors(mesh)
+    assert main_colors[:10].tolist() == [[1.0, 0.0, 0.0, 1.0]] * 10
+    numpy.testing.assert_allclose(main_colors[10:, 0], 1 - before[10:, 0])
+    command.undoIt()
+    numpy.testing.assert_array_equal(get_main_colors(mesh), before)
+
+
+def test_channel_op_skips_uncolored_mesh(plugin, mesh_path, mesh):
+    other_path = maya_standin.create_mesh("pPlane2", 16)
+    other = maya_standin.SCENE[other_path]
+    other.color_sets.clear()
+    maya_standin.State.selection = [mesh_path, other_path]
+    before = get_main_colors(mesh).copy()
+    run(plugin.VertexColorChannelOp(), invert=["R"])
+
+    assert not other.color_sets
+    numpy.testing.assert_allclose(get_main_colors(mesh)[:, 0], 1 - before[:, 0])
+
+
+def test_selected_components_take_precedence(plugin, mesh_path):
+    maya_standin.State.components = [
+        mesh_path + ".vtx[2:4]",
+        "pPlane1Shape.vtx[10]",
+    ]
+    selected = plugin.ApplyVertexColorBase.get_selected_vertices()
+    assert list(selected) == [mesh_path]
+    assert selected[mesh_path].tolist() == [2, 3, 4, 10]
+
+
+def test_flood_components(plugin, mesh_path, mesh):
+    maya_standin.State.components = [mesh_path + ".vtx[0:4]"]
+    get_main_colors(mesh)[0] = vertex_color_engine.UNSET_COLOR
+    before = get_main_colors(mesh).copy()
+    command = run(plugin.VertexColorChannelFlood(), channel=["A"], value=[0.25])
+
+    main_colors = get_main_colors(mesh)
+    assert main_colors[0].tolist() == [0.0, 0.0, 0.0, 0.25]
+    numpy.testing.assert_array_equal(main_colors[1:5, 3], 0.25)
+    numpy.testing.assert_array_equal(main_colors[5:], before[5:])
+    command.undoIt()
+    numpy.testing.assert_array_equal(get_main_colors(mesh), before)
+
+
+def test_smooth_components(plugin, mesh_path, mesh):
+    maya_standin.State.components = [mesh_path + ".vtx[40:49]"]
+    before = get_main_colors(mesh).copy()
+    run(plugin.VertexColorChannelSmooth(), channel=["B"], iterations=[3])
+
+    changed = numpy.flatnonzero(numpy.any(get_main_colors(mesh) != before, axis=1))
+    assert changed.size and set(changed) <= set(range(40, 50))
+    numpy.testing.assert_array_equal(get_main_colors(mesh)[:, :2], before[:, :2])
+
+
+def test_export_import_round_trip(plugin, mesh_path, mesh, tmp_path):
+    directory = str(tmp_path)
+    before = get_main_colors(mesh).copy()
+    export = run(plugin.VertexColorExport(), directory=[directory], channel=["R"])
+    assert len(export.result) == 1
+
+    get_main_colors(mesh)[:] = vertex_color_engine.UNSET_COLOR
+    run(plugin.VertexColorImport(), directory=[directory])
+    main_colors = get_main_colors(mesh)
+    numpy.testing.assert_array_equal(main_colors[:, 0], before[:, 0])
+    numpy.testing.assert_array_equal(main_colors[:, 1:3], 0)
+
+
+def test_import_prefers_full_file(plugin, mesh_path, mesh, tmp_path):
+    directory = str(tmp_path)
+    before = get_main_colors(mesh).copy()
+    run(plugin.VertexColorExport(), directory=[directory])
+    get_main_colors(mesh)[:, 0] = 0.5
+    run(plugin.VertexColorExport(), directory=[directory], channel=["R"])
+
+    get_main_colors(mesh)[:] = vertex_color_engine.UNSET_COLOR
+    run(plugin.VertexColorImport(), directory=[directory])
+    numpy.testing.assert_array_equal(get_main_colors(mesh), before)
+
+
+def test_import_rejects_ambiguous_name(plugin, mesh_path, mesh, tmp_path):
+    directory = str(tmp_path)
+    run(plugin.VertexColorExport(), directory=[directory])
+    (entry,) = vertex_color_io.read_index(directory).values()
+    # NOTES(timmyliang): the same short name exported from two hierarchies
+    index = {}
+    for path in ("|a|pPlane1Shape", "|b|pPlane1Shape"):
+        index[path] = dict(entry, mesh=path)
+    vertex_color_io.write_index(directory, index)
+    get_main_colors(mesh)[:] = vertex_color_engine.UNSET_COLOR
+
+    command = run(plugin.VertexColorImport(), directory=[directory])
+    assert not command.isUndoable()
+    assert (get_main_colors(mesh) == vertex_color_engine.UNSET_COLOR).all()
+
+
+def test_import_rejects_other_topology(plugin, mesh_path, mesh, tmp_path):
+    directory = str(tmp_path)
+    run(plugin.VertexColorExport(), directory=[directory])
+    before = get_main_colors(mesh).copy()
+    mesh.connects = mesh.connects[::-1].copy()
+    plugin.AdjacencyCache.clear()
+
+    command = run(plugin.VertexColorImport(), directory=[directory])
+    assert not command.isUndoable()
+    numpy.testing.assert_array_equal(get_main_colors(mesh), before)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000])
+def test_stream_export(plugin, mesh_path, mesh, tmp_path, chunk_size):
+    file_path = str(tmp_path / "scene.vcpc")
+    command = run(
+        plugin.VertexColorStreamExport(), file=[file_path], chunkSize=[chunk_size]
+    )
+    assert command.result == [1, mesh.vertex_count]
+
+    index = vertex_color_io.read_container_index(file_path)
+    entry = index["meshes"][0]
+    assert entry["mesh"] == mesh_path
+    data = vertex_color_io.load_container_mesh(file_path, index, entry)
+    numpy.testing.assert_array_equal(data, get_main_colors(mesh))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import third-party modules
+import numpy
+import pytest
+
+# Import local modules
+import vertex_color_engine
+
+
+# NOTE(timmyliang): 3x3 vertex grid made of four quads
+COUNTS = [4, 4, 4, 4]
+CONNECTS = [0, 1, 4, 3, 1, 2, 5, 4, 3, 4, 7, 6, 4, 5, 8, 7]
+
+
+@pytest.fixture
+def adjacency():
+    return vertex_color_engine.build_adjacency(COUNTS, CONNECTS, 9)
+
+
+def get_neighbors(adjacency, vertex_id):
+    offsets, neighbors = adjacency
+    return neighbors[offsets[vertex_id] : offsets[vertex_id + 1]].tolist()
+
+
+def test_build_adjacency(adjacency):
+    assert get_neighbors(adjacency, 0) == [1, 3]
+    assert get_neighbors(adjacency, 4) == [1, 3, 5, 7]
+    assert get_neighbors(adjacency, 8) == [5, 7]
+    offsets, _ = adjacency
+    assert offsets[-1] == 24
+
+
+def test_build_adjacency_isolated_vertex():
+    offsets, neighbors = vertex_color_engine.build_adjacency(COUNTS, CONNECTS, 10)
+    assert offsets[9] == offsets[10] == len(neighbors)
+
+
+def test_gather_neighbors(adjacency):
+    offsets, neighbors = adjacency
+    ring, lengths = vertex_color_engine.gather_neighbors(
+        offsets, neighbors, numpy.array([0, 4])
+    )
+    assert ring.tolist() == [1, 3, 1, 3, 5, 7]
+    assert lengths.tolist() == [2, 4]
+
+
+def test_grow_vertices(adjacency):
+    offsets, neighbors = adjacency
+    grown = vertex_color_engine.grow_vertices(offsets, neighbors, [0])
+    assert grown.tolist() == [0, 1, 3]
+    grown = vertex_color_engine.grow_vertices(offsets, neighbors, [0], rings=2)
+    assert grown.tolist() == [0, 1, 2, 3, 4, 6]
+
+
+def test_topology_hash():
+    topology_hash = vertex_color_engine.topology_hash(COUNTS, CONNECTS)
+    assert topology_hash == vertex_color_engine.topology_hash(COUNTS, CONNECTS)
+    flipped = CONNECTS[:4][::-1] + CONNECTS[4:]
+    assert topology_hash != vertex_color_engine.topology_hash(COUNTS, flipped)
+
+
+def test_smooth_channel_keeps_constant(adjacency):
+    colors = vertex_color_engine.blank_colors(9)
+    colors[:, 0] = 0.5
+    smoothed = vertex_color_engine.smooth_channel(colors, 0, *adjacency)
+    numpy.testing.assert_allclose(smoothed, colors)
+
+
+def test_smooth_channel_averages_neighbors(adjacency):
+    colors = vertex_color_engine.blank_colors(9)
+    colors[4, 1] = 1.0
+    smoothed = vertex_color_engine.smooth_channel(colors, 1, *adjacency)
+    assert smoothed[4, 1] == 0
+    numpy.testing.assert_allclose(smoothed[[1, 3, 5, 7], 1], 1.0 / 3)
+    numpy.testing.assert_allclose(smoothed[[0, 2, 6, 8], 1], 0)
+    # NOTES(timmyliang): other channels and the input are untouched
+    numpy.testing.assert_array_equal(smoothed[:, [0, 2, 3]], colors[:, [0, 2, 3]])
+    assert colors[4, 1] == 1.0
+
+
+def test_smooth_channel_vertex_ids_and_strength(adjacency):
+    colors = vertex_color_engine.blank_colors(9)
+    colors[4, 0] = 1.0
+    smoothed = vertex_color_engine.smooth_channel(
+        colors, 0, *adjacency, vertex_ids=numpy.array([1, 4]), strength=0.5
+    )
+    assert smoothed[1, 0] == pytest.approx(1.0 / 3 * 0.5)
+    assert smoothed[4, 0] == pytest.approx(0.5)
+    assert smoothed[3, 0] == 0
+
+
+def test_fill_unset_colors():
+    colors = numpy.array(
+        [vertex_color_engine.UNSET_COLOR, (0.5, 0.5, 0.5, 0.5)], dtype=numpy.float32
+    )
+    filled = vertex_color_engine.fill_unset_colors(colors)
+    assert filled[0].tolist() == list(vertex_color_engine.BLANK_COLOR)
+    assert filled[1].tolist() == [0.5] * 4
+    assert colors[0].tolist() == list(vertex_color_engine.UNSET_COLOR)
+
+
+def test_diff_colors():
+    before = vertex_color_engine.blank_colors(3)
+    after = before.copy()
+    after[1, 2] = 1.0
+    delta = vertex_color_engine.diff_colors(numpy.array([5, 6, 7]), before, after)
+    assert delta.vertex_ids.tolist() == [6]
+    assert delta.after[0, 2] == 1.0
+    assert vertex_color_engine.delta_nbytes(delta) == delta.vertex_ids.nbytes + 32
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+# Import future modules
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+# Import third-party modules
+import numpy
+import pytest
+
+# Import local modules
+import vertex_color_io
+
+
+@pytest.fixture
+def colors():
+    return numpy.random.RandomState(0).rand(50, 4).astype(numpy.float32)
+
+
+def test_get_file_name_is_unique():
+    names = [
+        vertex_color_io.get_file_name(path)
+        for path in ("|a|b_c", "|a_b|c", "|ns:mesh", "|ns_mesh")
+    ]
+    assert len(set(names)) == len(names)
+    assert all("|" not in name and ":" not in name for name in names)
+    assert vertex_color_io.get_file_name("|a|b", "R").endswith(".R.npy")
+
+
+def test_npy_round_trip(tmp_path, colors):
+    directory = str(tmp_path)
+    entry = vertex_color_io.export_npy(directory, "|grp|mesh", colors, "hash")
+    channel_entry = vertex_color_io.export_npy(
+        directory, "|grp|mesh", colors, "hash", channel="G"
+    )
+    index = {entry["file"]: entry, channel_entry["file"]: channel_entry}
+    vertex_color_io.write_index(directory, index)
+
+    index = vertex_color_io.read_index(directory)
+    assert len(vertex_color_io.find_entries(index, "|grp|mesh")) == 2
+    # NOTES(timmyliang): fall back to the short name after a reparent
+    assert len(vertex_color_io.find_entries(index, "|other|mesh")) == 2
+    assert vertex_color_io.find_entries(index, "|grp|other") == []
+
+    data = vertex_color_io.load_npy(directory, index[entry["file"]])
+    numpy.testing.assert_array_equal(data, colors)
+    data = vertex_color_io.load_npy(directory, index[channel_entry["file"]])
+    numpy.testing.assert_array_equal(data, colors[:, 1])
+    assert index[entry["file"]]["vertex_count"] == len(colors)
+
+
+def test_find_entries_rejects_ambiguous_name(tmp_path, colors):
+    directory = str(tmp_path)
+    index = {}
+    for path in ("|a|mesh", "|b|mesh"):
+        entry = vertex_color_io.export_npy(directory, path, colors, "hash")
+        index[entry["file"]] = entry
+    assert len(vertex_color_io.find_entries(index, "|a|mesh")) == 1
+    with pytest.raises(ValueError):
+        vertex_color_io.find_entries(index, "|c|mesh")
+
+
+def test_read_index_missing(tmp_path):
+    assert vertex_color_io.read_index(str(tmp_path)) == {}
+
+
+@pytest.mark.parametrize("dtype", [numpy.float32, numpy.float16])
+def test_container_round_trip(tmp_path, colors, dtype):
+    path = str(tmp_path / "scene.vcpc")
+    empty = numpy.zeros((0, 4), dtype=numpy.float32)
+    with vertex_color_io.ContainerWriter(path, dtype) as writer:
+        chunks = [colors[start : start + 16] for start in range(0, len(colors), 16)]
+        writer.add_mesh("|a|aShape", "colorSet1", chunks)
+        writer.add_mesh("|b|bShape", "colorSet1", [colors[::-1]])
+        writer.add_mesh("|c|cShape", "colorSet1", [empty])
+
+    index = vertex_color_io.read_container_index(path)
+    assert index["dtype"] == numpy.dtype(dtype).str
+    assert [entry["mesh"] for entry in index["meshes"]] == [
+        "|a|aShape",
+        "|b|bShape",
+        "|c|cShape",
+    ]
+    expected = [colors, colors[::-1], empty]
+    for entry, colors in zip(index["meshes"], expected):
+        assert entry["vertex_count"] == len(colors)
+        if not len(colors):
+            continue
+        data = vertex_color_io.load_container_mesh(path, index, entry)
+        numpy.testing.assert_allclose(data, colors, atol=1e-3)
+
+
+def test_container_rejects_other_files(tmp_path):
+    path = tmp_path / "scene.vcpc"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        vertex_color_io.read_container_index(str(path))